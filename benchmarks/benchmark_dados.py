@@ -0,0 +1,346 @@
+"""Benchmark da camada de dados do dashboard sobre arquivos sintéticos no formato do Banco Mundial.
+
+Gera CSVs (ou ZIPs) com o mesmo layout dos arquivos baixados do Banco Mundial (4 linhas de cabeçalho,
+colunas de ano largas, tudo entre aspas), mede o tempo e o pico de memória de cada etapa em várias escalas
+e compara com uma baseline gravada. Roda offline e não sobe o Streamlit.
+
+Uso:
+    python benchmarks/benchmark_dados.py                        # escalas padrão, compara com a baseline
+    python benchmarks/benchmark_dados.py --escalas pequena media grande
+    python benchmarks/benchmark_dados.py --paises 800 --anos 70 --indicadores 12 --faltantes 0.4
+    python benchmarks/benchmark_dados.py --gravar-baseline      # atualiza benchmarks/baseline.json
+
+Sai com código 1 se alguma etapa ficar mais lenta (ou usar mais memória) que a baseline além dos limites.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+# Silencia os avisos "No runtime found" do Streamlit ao importar o dashboard fora do `streamlit run`
+streamlit.logger.set_log_level("ERROR")
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(PASTA_BENCHMARKS))
+import dados  # noqa: E402
+import metricas  # noqa: E402
+import dashboard  # noqa: E402  (só para a figura do heatmap)
+
+CAMINHO_BASELINE = os.path.join(PASTA_BENCHMARKS, "baseline.json")
+ANO_INICIAL = 1960
+
+# Escalas nomeadas: a "pequena" tem o tamanho de um arquivo real do Banco Mundial (266 entidades, 1960-2024).
+# A memória do motor de correlação cresce com países × anos × indicadores², por isso "grande" é opcional.
+ESCALAS = {
+    'pequena': {'paises': 266, 'anos': 65, 'indicadores': 8, 'faltantes': 0.35},
+    'media': {'paises': 600, 'anos': 65, 'indicadores': 16, 'faltantes': 0.35},
+    'grande': {'paises': 1000, 'anos': 80, 'indicadores': 24, 'faltantes': 0.35},
+}
+ESCALAS_PADRAO = ['pequena', 'media']
+
+REGIOES_SINTETICAS = ["East Asia & Pacific", "Europe & Central Asia", "Latin America & Caribbean",
+                      "Middle East & North Africa", "North America", "South Asia", "Sub-Saharan Africa"]
+
+
+# --- 1. GERAÇÃO DOS ARQUIVOS SINTÉTICOS ---
+def nomes_paises_sinteticos(n_paises):
+    # Os países de interesse do dashboard vêm primeiro (senão o filtro do modo padrão não acha nada)
+    nomes = list(dados.PAISES_INTERESSE_WB_ORIGINAL)[:n_paises]
+    nomes += [f"Pais Sintetico {i:05d}" for i in range(n_paises - len(nomes))]
+    codigos = [f"S{i:05d}" for i in range(len(nomes))]
+    return nomes, codigos
+
+def texto_csv_banco_mundial(nomes, codigos, codigo_indicador, nome_indicador, anos, valores):
+    # Mesmo layout do arquivo "Data" do Banco Mundial: BOM, 4 linhas de cabeçalho, tudo entre aspas e
+    # vírgula sobrando no fim de cada linha. Células sem dado são "".
+    df = pd.DataFrame(valores, columns=[str(ano) for ano in anos])
+    df.insert(0, 'Indicator Code', codigo_indicador)
+    df.insert(0, 'Indicator Name', nome_indicador)
+    df.insert(0, 'Country Code', codigos)
+    df.insert(0, 'Country Name', nomes)
+    cabecalho = '\ufeff"Data Source","World Development Indicators",\n\n"Last Updated Date","2025-04-15",\n\n'
+    return cabecalho + df.to_csv(index=False, quoting=csv.QUOTE_ALL, float_format='%.15g', na_rep='', lineterminator=',\n')
+
+def texto_metadados_paises(codigos, nomes, rng):
+    df = pd.DataFrame({'Country Code': codigos,
+                       'Region': rng.choice(REGIOES_SINTETICAS, size=len(codigos)),
+                       'IncomeGroup': '', 'SpecialNotes': '', 'TableName': nomes})
+    return '\ufeff' + df.to_csv(index=False, quoting=csv.QUOTE_ALL, lineterminator=',\r\n')
+
+def gerar_dados_sinteticos(pasta, paises, anos, indicadores, faltantes, formato='csv', semente=0):
+    # Retorna {nome_arquivo: nome_indicador} dos CSVs gerados (vazio no formato zip, descoberto pelo dashboard)
+    rng = np.random.default_rng(semente)
+    nomes, codigos = nomes_paises_sinteticos(paises)
+    lista_anos = list(range(ANO_INICIAL, ANO_INICIAL + anos))
+    pasta_csvs = os.path.join(pasta, "dados_baixados")
+    pasta_zips = os.path.join(pasta, "DADOS")
+    os.makedirs(pasta_csvs, exist_ok=True)
+    os.makedirs(pasta_zips, exist_ok=True)
+    metadados_paises = texto_metadados_paises(codigos, nomes, rng) if formato == 'zip' else None
+    arquivos = {}
+    for k in range(indicadores):
+        codigo_indicador = f"SYN.IND.{k:03d}"
+        nome_indicador = f"Indicador Sintetico {k:03d}"
+        # Nível próprio por país e indicador com ruído multiplicativo, como PIB, % do PIB etc.
+        nivel = rng.lognormal(mean=rng.uniform(0, 8), sigma=1.0, size=(paises, 1))
+        valores = nivel * rng.lognormal(mean=0.0, sigma=0.1, size=(paises, anos))
+        valores[rng.random((paises, anos)) < faltantes] = np.nan
+        texto = texto_csv_banco_mundial(nomes, codigos, codigo_indicador, nome_indicador, lista_anos, valores)
+        base = f"API_{codigo_indicador}_DS2_en_csv_v2_{k}"
+        if formato == 'zip':
+            with zipfile.ZipFile(os.path.join(pasta_zips, base + ".zip"), 'w', zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(f"Metadata_Indicator_{base}.csv",
+                            f'\ufeff"INDICATOR_CODE","INDICATOR_NAME","SOURCE_NOTE","SOURCE_ORGANIZATION",\r\n'
+                            f'"{codigo_indicador}","{nome_indicador}","",""\r\n')
+                zf.writestr(f"{base}.csv", texto)
+                zf.writestr(f"Metadata_Country_{base}.csv", metadados_paises)
+        else:
+            with open(os.path.join(pasta_csvs, base + ".csv"), 'w', encoding='utf-8', newline='') as f:
+                f.write(texto)
+            arquivos[base + ".csv"] = nome_indicador
+    return arquivos
+
+def apontar_dados_para(pasta, arquivos, anos):
+    # As funções de dados.py leem estas globais a cada chamada; nada é copiado ou simulado
+    dados.CAMINHO_PASTA_DADOS = os.path.join(pasta, "dados_baixados")
+    dados.CAMINHO_PASTA_ZIPS = os.path.join(pasta, "DADOS")
+    dados.CAMINHO_PASTA_CACHE = os.path.join(pasta, "cache")
+    dados.arquivos_a_carregar = arquivos
+    dados.ANOS_RANGE_COMPLETO = (ANO_INICIAL, ANO_INICIAL + anos - 1)
+    metricas.CAMINHO_ARQUIVO_METRICAS = os.path.join(pasta, "metricas.prom")
+
+
+# --- 2. ETAPAS MEDIDAS ---
+# Cada etapa é (nome, preparar, executar): preparar roda fora da medição e devolve o argumento de executar.
+def definir_etapas():
+    fontes = dados.listar_fontes_indicadores()
+    primeiro_indicador = next(iter(fontes))
+    caminho_arquivo, membro_zip = fontes[primeiro_indicador]
+    estado = {}
+    # O dashboard importa o Plotly no primeiro uso; importado aqui, fica fora da medição do heatmap
+    dashboard.px.imshow
+
+    def ler_df_bruto():
+        with dados.abrir_texto_fonte(caminho_arquivo, 'latin1', membro_zip) as arquivo_texto:
+            return pd.read_csv(arquivo_texto, skiprows=4)
+
+    def painel_completo():
+        if 'painel_completo' not in estado:
+            painel = dados.criar_painel_completo()
+            painel.garantir(painel.indicadores)
+            estado['painel_completo'] = painel
+        return estado['painel_completo']
+
+    def motor_correlacao():
+        if 'motor' not in estado:
+            estado['motor'] = dados.MotorCorrelacao(painel_completo())
+        motor = estado['motor']
+        motor.matriz.cache_clear()
+        return motor
+
+    def limpar_cache_disco():
+        shutil.rmtree(dados.CAMINHO_PASTA_CACHE, ignore_errors=True)
+
+    def preparar_cache_disco():
+        limpar_cache_disco()
+        dados.carregar_painel()
+
+    def heatmap(painel):
+        tabela = painel.tabela_serie(primeiro_indicador)
+        por_regiao, por_decada = dados.nivel_agregacao_sugerido(tabela, painel.regioes)
+        tabela = dados.agregar_tabela_serie(tabela, painel.regioes if por_regiao else None, por_decada)
+        return dashboard.figura_heatmap_serie.__wrapped__(None, primeiro_indicador, None, None, "Região", "Década", tabela)
+
+    def derivar(painel):
+        _, i_base = painel.indices_indicadores(painel.indicadores_base)
+        return dados.calcular_indicadores_derivados(painel.valores[:, :, i_base], dados.paises_comparaveis(painel))
+
+    def consultar_correlacao(motor):
+        return motor.correlacao(list(motor.idx_pais), motor.anos[0], motor.anos[-1])
+
+    anos_completos = dados.ANOS_RANGE_COMPLETO
+    return [
+        ('ler_csv_local', lambda: None,
+         lambda _: dados.ler_csv_local(caminho_arquivo, primeiro_indicador, dados.PAISES_INTERESSE_WB_ORIGINAL,
+                                           dados.ANOS_RANGE, dados.MAPA_NOMES_PAISES, membro_zip=membro_zip)),
+        ('ler_csv_local_todos_paises', lambda: None,
+         lambda _: dados.ler_csv_local(caminho_arquivo, primeiro_indicador, None, anos_completos,
+                                           dados.MAPA_NOMES_PAISES, membro_zip=membro_zip)),
+        ('processar_df_banco_mundial', ler_df_bruto,
+         lambda df_raw: dados.processar_df_banco_mundial(df_raw, primeiro_indicador, None, anos_completos,
+                                                             dados.MAPA_NOMES_PAISES)),
+        ('carregar_todos_os_dados_frio', limpar_cache_disco, lambda _: dados.carregar_painel()),
+        ('carregar_todos_os_dados_cache_disco', preparar_cache_disco, lambda _: dados.carregar_painel()),
+        ('painel_completo_todos_indicadores', lambda: estado.pop('painel_completo', None), lambda _: painel_completo()),
+        ('tabela_serie_heatmap', painel_completo, heatmap),
+        ('indicadores_derivados', painel_completo, derivar),
+        ('motor_correlacao', painel_completo, dados.MotorCorrelacao),
+        ('consulta_correlacao', motor_correlacao, consultar_correlacao),
+    ]
+
+def medir_etapa(preparar, executar, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        argumento = preparar()
+        inicio = time.perf_counter()
+        executar(argumento)
+        tempos.append(time.perf_counter() - inicio)
+    # Pico de memória numa execução à parte: o tracemalloc atrasa o código medido
+    argumento = preparar()
+    tracemalloc.start()
+    try:
+        executar(argumento)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Intervalo interquartil: o ruído típico da máquina, usado como margem na comparação com a baseline
+    q1, _, q3 = statistics.quantiles(tempos, n=4) if len(tempos) > 1 else (tempos[0],) * 3
+    return {'tempo_s': statistics.median(tempos), 'tempo_min_s': min(tempos), 'tempo_max_s': max(tempos),
+            'tempo_iqr_s': q3 - q1, 'pico_memoria_mb': pico / 2 ** 20}
+
+def rodar_escala(parametros, repeticoes, formato, semente):
+    pasta = tempfile.mkdtemp(prefix="benchmark_dados_")
+    try:
+        arquivos = gerar_dados_sinteticos(pasta, formato=formato, semente=semente, **parametros)
+        apontar_dados_para(pasta, arquivos, parametros['anos'])
+        resultados = {}
+        for nome, preparar, executar in definir_etapas():
+            # O dashboard registra cada arquivo lido com print; no benchmark isso só polui a saída
+            with contextlib.redirect_stdout(io.StringIO()):
+                resultados[nome] = medir_etapa(preparar, executar, repeticoes)
+            print(f"  {nome:<38} {resultados[nome]['tempo_s'] * 1000:10.1f} ms {resultados[nome]['pico_memoria_mb']:10.1f} MB")
+        return resultados
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+# --- 3. COMPARAÇÃO COM A BASELINE ---
+def descrever_ambiente():
+    return {'python': platform.python_version(), 'plataforma': platform.platform(), 'processador': platform.machine(),
+            'cpus': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__}
+
+def comparar_com_baseline(execucao, baseline, limite_tempo, limite_memoria, folga_tempo_s, folga_memoria_mb,
+                          fator_iqr):
+    # Regressão = pior que a baseline por mais que a margem, que é a maior entre o limite relativo, a folga
+    # absoluta (etapas de poucos milissegundos) e, no tempo, fator_iqr × o intervalo interquartil das repetições
+    # da baseline (o ruído medido da máquina). O tempo compara mediana com mediana; o pico de memória do
+    # tracemalloc é determinístico e é comparado direto. Devolve {(escala, etapa, métrica): descrição}.
+    regressoes = {}
+    if baseline.get('ambiente', {}).get('plataforma') != execucao['ambiente']['plataforma']:
+        print("⚠️ Baseline gravada em outro ambiente: os tempos podem não ser comparáveis.")
+    for nome_escala, escala in execucao['escalas'].items():
+        escala_base = baseline.get('escalas', {}).get(nome_escala)
+        if escala_base is None or (escala_base['parametros'], escala_base.get('formato')) != (escala['parametros'], escala['formato']):
+            print(f"ℹ️ Escala '{nome_escala}' sem baseline correspondente, comparação ignorada.")
+            continue
+        for nome_etapa, atual in escala['etapas'].items():
+            base = escala_base['etapas'].get(nome_etapa)
+            if base is None:
+                continue
+            comparacoes = (('tempo_s', atual['tempo_s'], base['tempo_s'],
+                            max(limite_tempo * base['tempo_s'], folga_tempo_s, fator_iqr * base.get('tempo_iqr_s', 0.0))),
+                           ('pico_memoria_mb', atual['pico_memoria_mb'], base['pico_memoria_mb'],
+                            max(limite_memoria * base['pico_memoria_mb'], folga_memoria_mb)))
+            for metrica, valor, referencia, margem in comparacoes:
+                if valor - referencia > margem:
+                    regressoes[(nome_escala, nome_etapa, metrica)] = (f"{nome_escala}/{nome_etapa}: {metrica} {referencia:.4g} "
+                                                                      f"-> {valor:.4g} (+{(valor / referencia - 1) * 100:.0f}%)")
+    return regressoes
+
+def medir_escalas(escalas, repeticoes, formato, semente):
+    execucao = {'ambiente': descrever_ambiente(), 'repeticoes': repeticoes, 'escalas': {}}
+    for nome_escala, parametros in escalas.items():
+        print(f"Escala '{nome_escala}': {parametros}")
+        etapas = rodar_escala(parametros, repeticoes, formato, semente)
+        execucao['escalas'][nome_escala] = {'parametros': parametros, 'formato': formato, 'etapas': etapas}
+    return execucao
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da camada de dados do dashboard com dados sintéticos do Banco Mundial.")
+    parser.add_argument('--escalas', nargs='+', choices=sorted(ESCALAS), default=ESCALAS_PADRAO)
+    parser.add_argument('--paises', type=int, help="Escala personalizada: número de países (substitui --escalas).")
+    parser.add_argument('--anos', type=int, default=65, help="Escala personalizada: número de anos a partir de 1960.")
+    parser.add_argument('--indicadores', type=int, default=8, help="Escala personalizada: número de indicadores.")
+    parser.add_argument('--faltantes', type=float, default=0.35, help="Escala personalizada: fração de células sem dado.")
+    parser.add_argument('--formato', choices=['csv', 'zip'], default='csv', help="CSVs soltos em dados_baixados ou ZIPs em DADOS.")
+    parser.add_argument('--repeticoes', type=int, default=5,
+                        help="Repetições por etapa. Grave a baseline com mais (ex.: 15) para cobrir o ruído da máquina.")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--baseline', default=CAMINHO_BASELINE)
+    parser.add_argument('--gravar-baseline', action='store_true', help="Grava os resultados como nova baseline em vez de comparar.")
+    parser.add_argument('--limite-tempo', type=float, default=0.25, help="Aumento relativo de tempo tolerado (0.25 = 25%%).")
+    parser.add_argument('--limite-memoria', type=float, default=0.20, help="Aumento relativo de pico de memória tolerado.")
+    parser.add_argument('--folga-tempo-ms', type=float, default=2.0)
+    parser.add_argument('--fator-iqr', type=float, default=3.0,
+                        help="Margem de tempo em múltiplos do intervalo interquartil das repetições da baseline.")
+    parser.add_argument('--folga-memoria-mb', type=float, default=1.0)
+    parser.add_argument('--saida', help="Grava os resultados desta execução em JSON.")
+    args = parser.parse_args()
+
+    if args.paises is not None:
+        escalas = {'personalizada': {'paises': args.paises, 'anos': args.anos,
+                                     'indicadores': args.indicadores, 'faltantes': args.faltantes}}
+    else:
+        escalas = {nome: ESCALAS[nome] for nome in args.escalas}
+
+    execucao = medir_escalas(escalas, args.repeticoes, args.formato, args.semente)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(execucao, f, indent=2, ensure_ascii=False)
+
+    if args.gravar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        # Escalas não rodadas agora continuam com os valores antigos
+        baseline['ambiente'] = execucao['ambiente']
+        baseline.setdefault('escalas', {}).update(execucao['escalas'])
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"✔️ Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ Nenhuma baseline em {args.baseline}; rode com --gravar-baseline para criar uma.")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    limites = (args.limite_tempo, args.limite_memoria, args.folga_tempo_ms / 1000, args.folga_memoria_mb, args.fator_iqr)
+    regressoes = comparar_com_baseline(execucao, baseline, *limites)
+    # O intervalo interquartil cobre o ruído dentro de uma rodada, mas a máquina inteira às vezes fica mais lenta
+    # por alguns segundos: regressão de tempo só conta se se repetir numa nova medição da escala
+    suspeitas = {nome_escala for nome_escala, _, metrica in regressoes if metrica == 'tempo_s'}
+    if suspeitas:
+        print(f"ℹ️ Tempo acima da baseline em {', '.join(sorted(suspeitas))}; medindo de novo para confirmar.")
+        remedicao = medir_escalas({nome: escalas[nome] for nome in suspeitas}, args.repeticoes, args.formato, args.semente)
+        confirmadas = comparar_com_baseline(remedicao, baseline, *limites)
+        regressoes = {chave: confirmadas.get(chave, descricao) for chave, descricao in regressoes.items()
+                      if chave[2] != 'tempo_s' or chave in confirmadas}
+    if regressoes:
+        print("❌ Regressões em relação à baseline:")
+        for regressao in regressoes.values():
+            print(f"  {regressao}")
+        return 1
+    print("✔️ Nenhuma regressão em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1053 @@
+# Camada de dados do dashboard: leitura dos arquivos do Banco Mundial, painel país × ano × indicador,
+# agregações, motor de correlação e cache em disco. Não importa nada de interface (Streamlit, Plotly),
+# e pandas/NumPy só são carregados no primeiro uso. Usada pelo dashboard.py, pelos benchmarks e pela linha
+# de comando no fim do arquivo, que o start.sh roda antes de subir o servidor:
+#     python dados.py    # valida os arquivos de dados e pré-aquece o cache em disco
+import os
+import io
+import re
+import csv
+import sys
+import json
+import time
+import zipfile
+import hashlib
+import argparse
+import functools
+import importlib
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import metricas
+from metricas import medir, contar, definir
+
+class ModuloSobDemanda:
+    # Importa o módulo no primeiro acesso a um atributo: `import dados` fica barato e o custo de importar
+    # pandas/NumPy (ou Plotly, no dashboard) só é pago quando alguma função realmente precisa deles
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nome)
+        return getattr(self._modulo, atributo)
+
+np = ModuloSobDemanda("numpy")
+pd = ModuloSobDemanda("pandas")
+
+# --- 1. CONFIGURAÇÕES ---
+CAMINHO_PASTA_DADOS = "dados_baixados"
+# ZIPs originais do Banco Mundial (API_<código>_DS2_en_csv_v2_*.zip), lidos sem extração
+CAMINHO_PASTA_ZIPS = "DADOS"
+PAISES_INTERESSE_WB_ORIGINAL = [
+    'Brazil', 'United States', 'Germany', 'Korea, Rep.', 'China', 'India',
+    'South Africa', 'Russian Federation', 'Mexico', 'Argentina', 'Chile',
+    'Colombia', 'Ireland', 'Vietnam'
+]
+MAPA_NOMES_PAISES = {
+    'Korea, Rep.': 'Coreia do Sul',
+    'United States': 'EUA',
+    'Russian Federation': 'Rússia',
+    'Brazil': 'Brasil'
+}
+
+PAISES_DASHBOARD = sorted([MAPA_NOMES_PAISES.get(p, p) for p in PAISES_INTERESSE_WB_ORIGINAL])
+ANOS_RANGE = (2010, 2023)
+
+# Modo ampliado: todas as entidades dos arquivos do Banco Mundial e o histórico completo,
+# com cada indicador carregado apenas quando uma visualização precisa dele
+ANOS_RANGE_COMPLETO = (1960, 2024)
+# Acima deste tamanho o heatmap é agregado (regiões/décadas)
+LIMITE_CELULAS_HEATMAP = 1500
+# Entidades sem região no Metadata_Country (agregados como "World", grupos de renda) ou sem metadados
+REGIAO_AGREGADOS = "Agregados e sem região"
+
+# Cache em disco do painel processado (Feather), compartilhado entre processos/réplicas
+CAMINHO_PASTA_CACHE = ".cache_dados"
+VERSAO_FORMATO_CACHE = 2
+
+# Janela, em anos, da taxa de crescimento composta (CAGR) derivada de cada indicador
+JANELA_CAGR = 5
+
+# Número máximo de arquivos de indicadores lidos em paralelo
+MAX_WORKERS_LEITURA = min(8, os.cpu_count() or 1)
+
+# Intervalo mínimo, em segundos, entre duas verificações de alterações nos arquivos de dados
+INTERVALO_VERIFICACAO_ARQUIVOS = 5.0
+
+# Matrizes de correlação (conjunto de países, janela de anos) mantidas em memória por processo
+TAMANHO_CACHE_CORRELACAO = 256
+
+# --- 2. FUNÇÕES PARA PROCESSAMENTO DE DADOS ---
+# (As funções de processamento de dados permanecem as mesmas, não precisam de alteração)
+def processar_df_banco_mundial(df_raw, nome_novo_indicador, paises_interesse_original_wb, anos_range_tuple, mapa_nomes):
+    cols_anos = [str(ano) for ano in range(anos_range_tuple[0], anos_range_tuple[1] + 1)]
+    cols_anos_existentes = [col for col in cols_anos if col in df_raw.columns]
+    
+    if 'Country Name' not in df_raw.columns:
+        print(f"AVISO: Coluna 'Country Name' não encontrada no arquivo para {nome_novo_indicador}.")
+        return pd.DataFrame(columns=['País', 'Ano', nome_novo_indicador])
+        
+    if not cols_anos_existentes:
+        print(f"AVISO: Nenhuma coluna de ano no intervalo {anos_range_tuple} encontrada para {nome_novo_indicador}. Países no arquivo: {df_raw['Country Name'].unique()[:5]}")
+        return pd.DataFrame(columns=['País', 'Ano', nome_novo_indicador])
+
+    cols_to_keep = ['Country Name'] + cols_anos_existentes
+    df_processed_subset = df_raw[cols_to_keep]
+    if paises_interesse_original_wb is not None:
+        df_processed_subset = df_processed_subset[df_processed_subset['Country Name'].isin(paises_interesse_original_wb)]
+    
+    if df_processed_subset.empty:
+        return pd.DataFrame(columns=['País', 'Ano', nome_novo_indicador])
+
+    with medir('melt') as info:
+        df_long = pd.melt(df_processed_subset, id_vars=['Country Name'], value_vars=cols_anos_existentes,
+                          var_name='Ano', value_name=nome_novo_indicador)
+
+        df_long['Ano'] = pd.to_numeric(df_long['Ano'])
+        df_long[nome_novo_indicador] = pd.to_numeric(df_long[nome_novo_indicador], errors='coerce')
+
+        df_long['País'] = df_long['Country Name'].map(mapa_nomes).fillna(df_long['Country Name'])
+        df_long = df_long.drop(columns=['Country Name'])
+        info['linhas'], info['bytes'] = len(df_long), int(df_long.memory_usage(index=False).sum())
+
+    return df_long[['País', 'Ano', nome_novo_indicador]]
+
+def filtrar_linhas_paises(arquivo_texto, paises_interesse_original_wb, skiprows=4):
+    # Descarta as linhas de países fora da lista antes do parsing: o read_csv só tokeniza o cabeçalho
+    # e as ~14 linhas de interesse, em vez das ~266 do arquivo do Banco Mundial.
+    # O primeiro campo ("Country Name") é lido pelo módulo csv: vale para linhas com todos os campos entre aspas
+    # (arquivo original do Banco Mundial) e para as que só citam os campos que precisam (pandas, Excel).
+    # Com paises_interesse_original_wb=None todas as linhas são mantidas (modo ampliado).
+    paises = None if paises_interesse_original_wb is None else set(paises_interesse_original_wb)
+    linhas = iter(arquivo_texto)
+    for _ in range(skiprows):
+        next(linhas, None)
+    linhas_mantidas = []
+    for linha in linhas:
+        if linha.strip():
+            linhas_mantidas.append(linha)
+            break
+    for linha in linhas:
+        if paises is None or next(csv.reader([linha]), [None])[0] in paises:
+            linhas_mantidas.append(linha)
+    return io.StringIO(''.join(linhas_mantidas))
+
+@contextlib.contextmanager
+def abrir_texto_fonte(caminho_arquivo, encoding, membro_zip=None):
+    # CSV solto ou membro de um ZIP, lido em streaming (o membro nunca é extraído para o disco)
+    if membro_zip is None:
+        with open(caminho_arquivo, encoding=encoding) as arquivo_texto:
+            yield arquivo_texto
+    else:
+        with zipfile.ZipFile(caminho_arquivo) as zf, zf.open(membro_zip) as membro:
+            yield io.TextIOWrapper(membro, encoding=encoding)
+
+def ler_csv_local(caminho_arquivo, nome_novo_indicador, paises_interesse_original_wb, anos_range_tuple, mapa_nomes, skiprows=4, encoding='latin1', membro_zip=None):
+    abs_path = os.path.abspath(caminho_arquivo)
+    if membro_zip is not None:
+        abs_path = f"{abs_path}:{membro_zip}"
+    print(f"Tentando ler arquivo local: {abs_path} para {nome_novo_indicador}...")
+    cols_anos = {str(ano) for ano in range(anos_range_tuple[0], anos_range_tuple[1] + 1)}
+    try:
+        # read_csv = abertura, pré-filtro de linhas e parsing; bytes = texto entregue ao parser
+        with medir('read_csv') as info:
+            with abrir_texto_fonte(caminho_arquivo, encoding, membro_zip) as arquivo_texto:
+                csv_filtrado = filtrar_linhas_paises(arquivo_texto, paises_interesse_original_wb, skiprows=skiprows)
+            # Só 'Country Name' e os anos dentro de ANOS_RANGE. Sem dtype fixo: uma célula não numérica (ex.: '..')
+            # vira NaN no pd.to_numeric(errors='coerce') de processar_df_banco_mundial, sem derrubar o indicador
+            df_raw = pd.read_csv(csv_filtrado,
+                                 usecols=lambda col: col == 'Country Name' or col in cols_anos)
+            info['linhas'], info['bytes'] = len(df_raw), len(csv_filtrado.getvalue())
+        df_processed = processar_df_banco_mundial(df_raw, nome_novo_indicador, paises_interesse_original_wb, anos_range_tuple, mapa_nomes)
+        
+        if df_processed.empty:
+            msg = f"ℹ️ Nenhum dado processado para '{nome_novo_indicador}' do arquivo '{os.path.basename(caminho_arquivo)}' para os países/anos de interesse."
+            if 'Country Name' in df_raw.columns and (paises_interesse_original_wb is None or df_raw['Country Name'].isin(paises_interesse_original_wb).any()):
+                msg = f"⚠️ Países de interesse existem em '{os.path.basename(caminho_arquivo)}' para '{nome_novo_indicador}', mas o processamento resultou em dados vazios (verifique anos/valores no CSV)."
+            print(msg)
+            return None, msg
+        
+        msg = f"✔️ '{nome_novo_indicador}' lido do arquivo: {os.path.basename(caminho_arquivo)}"
+        print(msg)
+        return df_processed, msg
+    except FileNotFoundError:
+        error_message = f"❌ ARQUIVO NÃO ENCONTRADO: {abs_path}. Indicador '{nome_novo_indicador}' não será carregado."
+        print(error_message)
+        return None, error_message
+    except Exception as e:
+        error_message = f"❌ Erro ao ler ou processar {abs_path} para '{nome_novo_indicador}': {e}. Indicador não será carregado."
+        print(error_message)
+        return None, error_message
+
+arquivos_a_carregar = {
+    'banco_mundial_pib_per_capita_ppp.csv': 'PIB per capita (PPP Dólar)',
+    'banco_mundial_gasto_educ_perc_pib.csv': 'Gasto em Educação (% PIB)',
+    'banco_mundial_industria_perc_pib.csv': 'Indústria (% PIB)',
+    'banco_mundial_manuf_export_perc.csv': 'Manufaturados nas Exportações (%)',
+    'banco_mundial_manufatura_perc_pib.csv': 'Manufatura (% PIB)',
+    'banco_mundial_gasto_pd_perc_pib.csv': 'Gasto em P&D (% PIB)',
+    'banco_mundial_gasto_gov_educ_total.csv': 'Gasto Gov. Educação (% Gasto Gov.)'
+}
+
+# Nomes em português para os códigos do Banco Mundial já usados no dashboard.
+# Indicadores descobertos em ZIPs com códigos fora desta lista usam o INDICATOR_NAME do Metadata_Indicator.
+NOMES_INDICADORES_POR_CODIGO = {
+    'NY.GDP.PCAP.PP.CD': 'PIB per capita (PPP Dólar)',
+    'SE.XPD.TOTL.GD.ZS': 'Gasto em Educação (% PIB)',
+    'NV.IND.TOTL.ZS': 'Indústria (% PIB)',
+    'TX.VAL.MANF.ZS.UN': 'Manufaturados nas Exportações (%)',
+    'NV.IND.MANF.ZS': 'Manufatura (% PIB)',
+    'GB.XPD.RSDV.GD.ZS': 'Gasto em P&D (% PIB)',
+}
+
+PADRAO_ZIP_BANCO_MUNDIAL = re.compile(r'^API_(?P<codigo>.+?)_DS2_.*\.zip$', re.IGNORECASE)
+
+def ler_metadados_indicador_zip(zf):
+    for membro in zf.namelist():
+        if os.path.basename(membro).startswith('Metadata_Indicator_'):
+            with zf.open(membro) as f:
+                for linha in csv.DictReader(io.TextIOWrapper(f, encoding='utf-8-sig')):
+                    return linha
+    return {}
+
+def descobrir_indicadores_zip(pasta_zips):
+    # Retorna {nome_indicador: (caminho_zip, membro_dados)} para cada API_<código>_*.zip da pasta
+    indicadores = {}
+    if not os.path.isdir(pasta_zips):
+        return indicadores
+    for nome_arquivo in sorted(os.listdir(pasta_zips)):
+        correspondencia = PADRAO_ZIP_BANCO_MUNDIAL.match(nome_arquivo)
+        if not correspondencia:
+            continue
+        codigo = correspondencia.group('codigo')
+        caminho_zip = os.path.join(pasta_zips, nome_arquivo)
+        try:
+            with zipfile.ZipFile(caminho_zip) as zf:
+                membros_dados = [m for m in zf.namelist()
+                                 if os.path.basename(m).startswith('API_') and m.lower().endswith('.csv')]
+                if not membros_dados:
+                    print(f"AVISO: Nenhum CSV de dados 'API_*.csv' dentro de '{nome_arquivo}'.")
+                    continue
+                metadados = ler_metadados_indicador_zip(zf)
+        except (zipfile.BadZipFile, OSError) as e:
+            print(f"AVISO: ZIP '{caminho_zip}' ignorado: {e}")
+            continue
+        nome_indicador = NOMES_INDICADORES_POR_CODIGO.get(codigo) or metadados.get('INDICATOR_NAME') or codigo
+        if nome_indicador in indicadores:
+            print(f"AVISO: Mais de um ZIP para '{nome_indicador}' ({codigo}); usando '{nome_arquivo}'.")
+        indicadores[nome_indicador] = (caminho_zip, membros_dados[0])
+    return indicadores
+
+def listar_fontes_indicadores():
+    # Registro {nome_indicador: (caminho_arquivo, membro_zip ou None)}.
+    # Os ZIPs de CAMINHO_PASTA_ZIPS têm precedência; os CSVs de arquivos_a_carregar cobrem o restante.
+    fontes_zip = descobrir_indicadores_zip(CAMINHO_PASTA_ZIPS)
+    fontes = {}
+    for nome_arquivo, nome_indicador in arquivos_a_carregar.items():
+        if nome_indicador in fontes_zip:
+            fontes[nome_indicador] = fontes_zip.pop(nome_indicador)
+        else:
+            fontes[nome_indicador] = (os.path.join(CAMINHO_PASTA_DADOS, nome_arquivo), None)
+    fontes.update(fontes_zip)
+    return fontes
+
+# --- 3. PAINEL PAÍS × ANO × INDICADOR ---
+def tipo_compacto(valores):
+    # Teste de faixa, não de precisão: float32 (metade da memória) sempre que todos os valores estão na faixa
+    # normal dele, onde o arredondamento erra no máximo 2^-24 (~6e-8) relativo, abaixo da precisão dos dados do
+    # Banco Mundial. Fora dela (overflow, ou valores tão pequenos que viram subnormais ou zero) fica em float64.
+    limites = np.finfo(np.float32)
+    magnitudes = np.abs(valores[np.isfinite(valores)])
+    na_faixa = (magnitudes == 0) | ((magnitudes >= limites.tiny) & (magnitudes <= limites.max))
+    return np.float32 if bool(np.all(na_faixa)) else np.float64
+
+def fatia_ou_indices(indices):
+    # Índices consecutivos e crescentes viram um slice: a indexação básica do NumPy devolve uma view do cubo
+    # em vez de uma cópia
+    indices = np.asarray(indices, dtype=int)
+    if len(indices) > 0 and bool(np.all(np.diff(indices) == 1)):
+        return slice(int(indices[0]), int(indices[-1]) + 1)
+    return indices
+
+class PainelIndicadores:
+    # Cubo denso valores[país, ano, indicador] (float32 ou float64, NaN = sem dado) com índices inteiros por eixo.
+    # Substitui o DataFrame longo: as views fatiam o array em vez de varrer o frame com máscaras booleanas.
+    # O cubo é somente leitura: um único painel por processo é compartilhado por todas as sessões
+    # (st.cache_resource) e as views devolvem DataFrames apoiados nele, sem cópia, sempre que possível.
+
+    def __init__(self, paises, anos, indicadores, valores, versao=None, regioes=None):
+        self.versao = versao
+        self.regioes = regioes or {}
+        self.paises = list(paises)
+        self.anos = [int(ano) for ano in anos]
+        self.indicadores = list(indicadores)
+        # {indicador derivado: indicador-base} (ver seção 4); vazio no painel só com os dados dos arquivos
+        self.derivados = {}
+        self.valores = valores
+        self.valores.flags.writeable = False
+        self.idx_pais = {pais: i for i, pais in enumerate(self.paises)}
+        self.idx_ano = {ano: i for i, ano in enumerate(self.anos)}
+        self.idx_indicador = {ind: i for i, ind in enumerate(self.indicadores)}
+
+    @classmethod
+    def de_series_longas(cls, lista_dfs, paises, anos):
+        # Cada df tem as colunas ['País', 'Ano', <indicador>]; preenche o cubo em uma única passada por indicador
+        indicadores = [df.columns[2] for df in lista_dfs]
+        valores = np.full((len(paises), len(anos), len(indicadores)), np.nan)
+        indice_paises, indice_anos = pd.Index(paises), pd.Index(anos)
+        for k, df in enumerate(lista_dfs):
+            cls.preencher_indicador(valores, k, df, indice_paises, indice_anos)
+        return cls(paises, anos, indicadores, valores.astype(tipo_compacto(valores), copy=False))
+
+    @staticmethod
+    def preencher_indicador(valores, k, df, indice_paises, indice_anos):
+        # Etapa que substituiu o antigo merge dos DataFrames longos
+        with medir('montagem_painel') as info:
+            i_pais = indice_paises.get_indexer(df['País'])
+            i_ano = indice_anos.get_indexer(pd.to_numeric(df['Ano'], errors='coerce'))
+            validos = (i_pais >= 0) & (i_ano >= 0)
+            # Em pares (País, Ano) repetidos prevalece a última ocorrência, como no antigo drop_duplicates(keep='last')
+            valores[i_pais[validos], i_ano[validos], k] = pd.to_numeric(df.iloc[:, 2], errors='coerce').to_numpy(dtype=float)[validos]
+            info['linhas'] = int(validos.sum())
+
+    @property
+    def indicadores_base(self):
+        # Indicadores lidos dos arquivos, sem os derivados
+        return [ind for ind in self.indicadores if ind not in self.derivados]
+
+    def garantir(self, indicadores):
+        # No painel completo todos os indicadores já estão em memória; PainelSobDemanda carrega aqui
+        pass
+
+    @classmethod
+    def de_dataframe(cls, df):
+        paises = list(pd.unique(df['País']))
+        anos = sorted(pd.unique(df['Ano']))
+        indicadores = [col for col in df.columns if col not in ['País', 'Ano']]
+        return cls.de_series_longas([df[['País', 'Ano', ind]] for ind in indicadores], paises, anos)
+
+    def para_dataframe(self):
+        # Formato longo País × Ano (ordenado por País, Ano), usado no cache em disco.
+        # Tipos compactos: País categórico, Ano int16 e os indicadores no tipo do cubo.
+        df = pd.DataFrame(self.valores.reshape(len(self.paises) * len(self.anos), len(self.indicadores)),
+                          columns=self.indicadores, copy=False)
+        df.insert(0, 'Ano', np.tile(np.asarray(self.anos, dtype=np.int16), len(self.paises)))
+        df.insert(0, 'País', pd.Categorical.from_codes(np.repeat(np.arange(len(self.paises)), len(self.anos)),
+                                                         categories=self.paises))
+        return df
+
+    def indices_paises(self, paises=None):
+        if paises is None:
+            return np.arange(len(self.paises))
+        return np.array(sorted(self.idx_pais[p] for p in set(paises) if p in self.idx_pais), dtype=int)
+
+    def indices_indicadores(self, indicadores=None):
+        indicadores = self.indicadores if indicadores is None else [ind for ind in indicadores if ind in self.idx_indicador]
+        self.garantir(indicadores)
+        return indicadores, [self.idx_indicador[ind] for ind in indicadores]
+
+    def fatia_ano(self, ano, paises=None, indicadores=None):
+        # Tabela País × indicadores para um ano (linhas na ordem do painel)
+        i_paises = self.indices_paises(paises)
+        indicadores, i_indicadores = self.indices_indicadores(indicadores)
+        bloco = self.valores[:, self.idx_ano[ano], :][fatia_ou_indices(i_paises)][:, fatia_ou_indices(i_indicadores)]
+        df = pd.DataFrame(bloco, columns=indicadores, copy=False)
+        df.insert(0, 'País', [self.paises[i] for i in i_paises])
+        return df
+
+    def serie_pais(self, pais, indicadores=None):
+        # Tabela Ano × indicadores para um país
+        indicadores, i_indicadores = self.indices_indicadores(indicadores)
+        df = pd.DataFrame(self.valores[self.idx_pais[pais]][:, fatia_ou_indices(i_indicadores)], columns=indicadores, copy=False)
+        df.insert(0, 'Ano', self.anos)
+        return df
+
+    def tabela_serie(self, indicador, paises=None):
+        # Pivot País × Ano de um indicador, sem linhas/colunas totalmente vazias
+        i_paises = self.indices_paises(paises)
+        self.garantir([indicador])
+        with medir('pivot_serie') as info:
+            df = pd.DataFrame(self.valores[:, :, self.idx_indicador[indicador]][fatia_ou_indices(i_paises)],
+                              index=pd.Index([self.paises[i] for i in i_paises], name='País'),
+                              columns=pd.Index(self.anos, name='Ano'), copy=False)
+            df = df.dropna(how='all', axis=0).dropna(how='all', axis=1)
+            info['linhas'], info['bytes'] = df.shape[0], df.size * self.valores.itemsize
+        return df
+
+    def indicadores_com_dados(self, paises=None, ano=None):
+        bloco = self.valores[fatia_ou_indices(self.indices_paises(paises))]
+        if ano is not None:
+            bloco = bloco[:, self.idx_ano[ano], :]
+        else:
+            bloco = bloco.reshape(-1, len(self.indicadores))
+        tem_dados = ~np.isnan(bloco).all(axis=0)
+        return [ind for ind, ok in zip(self.indicadores, tem_dados) if ok]
+
+class PainelSobDemanda(PainelIndicadores):
+    # Mesmo cubo, mas cada coluna de indicador só é lida do arquivo na primeira vez em que uma view a pede.
+    # É compartilhado entre sessões (st.cache_resource), por isso a carga é protegida por uma trava e o cubo só
+    # fica gravável durante ela. Começa em float32 e passa a float64 se algum indicador não couber nele.
+
+    def __init__(self, paises, anos, fontes, versao=None, regioes=None):
+        derivados = registrar_indicadores_derivados(fontes)
+        valores = np.full((len(paises), len(anos), len(fontes) + len(derivados)), np.nan, dtype=np.float32)
+        super().__init__(paises, anos, list(fontes) + list(derivados), valores, versao=versao, regioes=regioes)
+        self.derivados = derivados
+        self.fontes = fontes
+        self.carregados = np.zeros(len(self.indicadores), dtype=bool)
+        self.mensagens = {}
+        self.trava = threading.Lock()
+
+    def garantir(self, indicadores):
+        # Um indicador derivado carrega o seu indicador-base; os derivados de cada base lida são calculados junto
+        bases = list(dict.fromkeys(self.derivados.get(ind, ind) for ind in indicadores))
+        faltantes = [ind for ind in bases if not self.carregados[self.idx_indicador[ind]]]
+        if not faltantes:
+            return
+        with self.trava:
+            faltantes = [ind for ind in faltantes if not self.carregados[self.idx_indicador[ind]]]
+            if not faltantes:
+                return
+
+            def ler_indicador(nome_indicador):
+                caminho_arquivo, membro_zip = self.fontes[nome_indicador]
+                return ler_csv_local(caminho_arquivo, nome_indicador, None, ANOS_RANGE_COMPLETO, MAPA_NOMES_PAISES, membro_zip=membro_zip)
+
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS_LEITURA, len(faltantes))) as executor:
+                resultados = list(executor.map(ler_indicador, faltantes))
+            indice_paises, indice_anos = pd.Index(self.paises), pd.Index(self.anos)
+            valores = self.valores
+            precisa_float64 = any(df_indicador is not None and tipo_compacto(df_indicador.iloc[:, 2].to_numpy(dtype=float)) == np.float64
+                                  for df_indicador, _ in resultados)
+            if precisa_float64 and valores.dtype != np.float64:
+                valores = valores.astype(np.float64)
+            else:
+                valores.flags.writeable = True
+            i_bases = [self.idx_indicador[ind] for ind in faltantes]
+            i_derivados = [self.idx_indicador[nome] for nome in registrar_indicadores_derivados(faltantes)]
+            try:
+                for k, (df_indicador, _) in zip(i_bases, resultados):
+                    if df_indicador is not None:
+                        self.preencher_indicador(valores, k, df_indicador, indice_paises, indice_anos)
+                derivados = calcular_indicadores_derivados(valores[:, :, i_bases], paises_comparaveis(self))
+                if tipo_compacto(derivados) == np.float64 and valores.dtype != np.float64:
+                    valores.flags.writeable = False
+                    valores = valores.astype(np.float64)
+                valores[:, :, i_derivados] = derivados
+            finally:
+                valores.flags.writeable = False
+            # Publica o cubo antes das marcas: garantir() consulta `carregados` sem a trava, e uma coluna marcada
+            # como carregada tem de estar no cubo que as outras sessões vão ler
+            self.valores = valores
+            for nome_indicador, (_, msg) in zip(faltantes, resultados):
+                self.mensagens[nome_indicador] = msg
+            self.carregados[i_bases + i_derivados] = True
+
+    def herdar_colunas(self, anterior, indicadores):
+        # Copia de um painel anterior as colunas já carregadas destes indicadores (arquivos inalterados),
+        # se os eixos de países e anos forem os mesmos; as demais continuam sob demanda
+        if anterior.paises != self.paises or anterior.anos != self.anos:
+            return
+        herdados = [ind for ind in indicadores if ind in self.idx_indicador and ind in anterior.idx_indicador
+                    and anterior.carregados[anterior.idx_indicador[ind]]]
+        herdados += [nome for nome in registrar_indicadores_derivados(herdados) if nome in anterior.idx_indicador]
+        if not herdados:
+            return
+        with self.trava:
+            valores = self.valores.astype(np.result_type(self.valores, anterior.valores))
+            for ind in herdados:
+                valores[:, :, self.idx_indicador[ind]] = anterior.valores[:, :, anterior.idx_indicador[ind]]
+            valores.flags.writeable = False
+            self.valores = valores
+            for ind in herdados:
+                self.carregados[self.idx_indicador[ind]] = True
+                if ind in anterior.mensagens:
+                    self.mensagens[ind] = anterior.mensagens[ind]
+
+    def indicadores_com_dados(self, paises=None, ano=None):
+        # Indicadores ainda não lidos entram na lista sem verificação: checar exigiria carregá-los
+        com_dados = set(super().indicadores_com_dados(paises, ano))
+        return [ind for ind in self.indicadores if ind in com_dados or not self.carregados[self.idx_indicador[ind]]]
+
+def ler_regioes_por_codigo(fontes):
+    # {código do país: região} do membro Metadata_Country do primeiro ZIP que o tenha (qualquer indicador)
+    for caminho_arquivo, membro_zip in fontes.values():
+        if membro_zip is None:
+            continue
+        try:
+            with zipfile.ZipFile(caminho_arquivo) as zf:
+                membro_paises = next((m for m in zf.namelist() if os.path.basename(m).startswith('Metadata_Country_')), None)
+                if membro_paises is None:
+                    continue
+                with zf.open(membro_paises) as f:
+                    df_meta = pd.read_csv(f, encoding='utf-8-sig', usecols=['Country Code', 'Region'])
+            return df_meta.dropna().set_index('Country Code')['Region'].to_dict()
+        except Exception as e:
+            print(f"AVISO: Regiões indisponíveis em '{caminho_arquivo}': {e}")
+    return {}
+
+def ler_universo_paises(fontes):
+    # Nomes (originais do Banco Mundial) e regiões de todas as entidades. A lista de países vem da primeira fonte
+    # legível; as regiões, do primeiro ZIP com Metadata_Country, associadas pelo código do país (uma fonte
+    # em CSV solto não traz regiões).
+    for caminho_arquivo, membro_zip in fontes.values():
+        try:
+            with abrir_texto_fonte(caminho_arquivo, 'latin1', membro_zip) as arquivo_texto:
+                df_paises = pd.read_csv(filtrar_linhas_paises(arquivo_texto, None), usecols=['Country Name', 'Country Code'])
+        except Exception as e:
+            print(f"AVISO: Não foi possível ler a lista de países de '{caminho_arquivo}': {e}")
+            continue
+        regioes_por_codigo = ler_regioes_por_codigo(fontes)
+        df_paises = df_paises.dropna(subset=['Country Name']).drop_duplicates(subset=['Country Name'])
+        nomes_originais = df_paises['Country Name'].tolist()
+        regioes = {MAPA_NOMES_PAISES.get(nome, nome): regioes_por_codigo.get(codigo, REGIAO_AGREGADOS)
+                   for nome, codigo in zip(df_paises['Country Name'], df_paises['Country Code'])}
+        return nomes_originais, regioes
+    return [], {}
+
+# --- 4. INDICADORES DERIVADOS ---
+# Métricas calculadas uma vez por versão dos dados sobre o cubo inteiro (todos os países, anos e indicadores),
+# com operações vetorizadas. Entram no painel como indicadores selecionáveis, depois dos indicadores-base;
+# as views só consultam valores prontos. Faltas seguem a semântica de NaN: uma métrica é NaN quando algum
+# dado de que depende falta. Cada função recebe valores[país, ano, k] em float64 e a máscara dos países
+# comparáveis (sem os agregados regionais) e devolve um array do mesmo formato.
+
+def deslocar_anos(valores, anos):
+    # Valor de `anos` anos antes (NaN nos primeiros anos do painel, que é contínuo em anos)
+    deslocado = np.full_like(valores, np.nan)
+    deslocado[:, anos:] = valores[:, :-anos]
+    return deslocado
+
+def crescimento_anual(valores, comparaveis):
+    # Variação percentual em relação ao ano anterior (mesma definição de pct_change)
+    anterior = deslocar_anos(valores, 1)
+    return np.where(anterior != 0, (valores / anterior - 1) * 100, np.nan)
+
+def crescimento_composto(valores, comparaveis):
+    # CAGR da janela de JANELA_CAGR anos terminando em cada ano; só definido para valores positivos
+    inicio = deslocar_anos(valores, JANELA_CAGR)
+    return np.where((inicio > 0) & (valores > 0), ((valores / inicio) ** (1 / JANELA_CAGR) - 1) * 100, np.nan)
+
+def posicao_entre_paises(valores, comparaveis):
+    # Posição (1 = maior valor) entre os países comparáveis com dado no mesmo ano; empates ficam na menor posição
+    posicoes = np.full_like(valores, np.nan)
+    bloco = valores[comparaveis]
+    posicoes[comparaveis] = pd.DataFrame(bloco.reshape(bloco.shape[0], bloco.shape[1] * bloco.shape[2]), copy=False).rank(
+        method='min', ascending=False).to_numpy().reshape(bloco.shape)
+    return posicoes
+
+def escore_padronizado(valores, comparaveis):
+    # Escore z entre os países comparáveis no mesmo ano (média e desvio-padrão populacional); NaN com menos de
+    # dois países com dado ou desvio nulo
+    presente = ~np.isnan(valores) & comparaveis[:, None, None]
+    n = presente.sum(axis=0)
+    media = np.where(presente, valores, 0.0).sum(axis=0) / n
+    desvio = np.sqrt(np.where(presente, (valores - media) ** 2, 0.0).sum(axis=0) / n)
+    return np.where(presente & (n >= 2) & (desvio > 0), (valores - media) / desvio, np.nan)
+
+# {rótulo: função}; o nome de cada derivado é "<indicador> · <rótulo>"
+DERIVACOES = {
+    "Crescimento anual (%)": crescimento_anual,
+    f"CAGR {JANELA_CAGR} anos (%)": crescimento_composto,
+    "Posição entre os países": posicao_entre_paises,
+    "Escore z entre os países": escore_padronizado,
+}
+
+def nome_derivado(indicador, rotulo):
+    return f"{indicador} · {rotulo}"
+
+def registrar_indicadores_derivados(indicadores):
+    # {nome do derivado: indicador-base}, agrupados por indicador-base na ordem de DERIVACOES
+    return {nome_derivado(ind, rotulo): ind for ind in indicadores for rotulo in DERIVACOES}
+
+def paises_comparaveis(painel):
+    # Posição e escore z comparam países: os agregados (regiões, grupos de renda) do modo ampliado ficam de fora.
+    # Sem metadados de região (fonte em CSV) todas as entidades entram.
+    comparaveis = np.array([painel.regioes.get(pais) != REGIAO_AGREGADOS for pais in painel.paises], dtype=bool)
+    return comparaveis if comparaveis.any() else np.ones(len(painel.paises), dtype=bool)
+
+def calcular_indicadores_derivados(valores, comparaveis):
+    # valores[país, ano, k] -> derivados[país, ano, k * len(DERIVACOES)], na ordem de registrar_indicadores_derivados
+    with medir('indicadores_derivados') as info:
+        base = valores.astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            derivados = np.stack([funcao(base, comparaveis) for funcao in DERIVACOES.values()], axis=3)
+        derivados = derivados.reshape(base.shape[0], base.shape[1], -1)
+        info['linhas'], info['bytes'] = base.shape[0] * base.shape[1], derivados.nbytes
+    return derivados
+
+def com_indicadores_derivados(painel):
+    # Novo painel com os indicadores-base seguidos dos derivados (o painel recebido não é alterado)
+    derivados = registrar_indicadores_derivados(painel.indicadores)
+    valores = np.concatenate([painel.valores, calcular_indicadores_derivados(painel.valores, paises_comparaveis(painel))], axis=2)
+    novo = PainelIndicadores(painel.paises, painel.anos, painel.indicadores + list(derivados),
+                             valores.astype(tipo_compacto(valores), copy=False), versao=painel.versao, regioes=painel.regioes)
+    novo.derivados = derivados
+    return novo
+
+# --- 5. AGREGAÇÃO DE TABELAS GRANDES PARA O HEATMAP ---
+def agregar_tabela_serie(tabela, regioes=None, por_decada=False):
+    # Reduz o pivot País × Ano antes de enviá-lo ao Plotly: média por região do Banco Mundial e/ou por década
+    if regioes is not None:
+        grupos = tabela.index.map(lambda pais: regioes.get(pais, REGIAO_AGREGADOS))
+        tabela = tabela.groupby(grupos).mean()
+        tabela.index.name = 'Região'
+    if por_decada:
+        tabela = tabela.T.groupby(lambda ano: f"{ano // 10 * 10}s").mean().T
+        tabela.columns.name = 'Década'
+    return tabela.dropna(how='all', axis=0).dropna(how='all', axis=1)
+
+def nivel_agregacao_sugerido(tabela, regioes):
+    # (por_regiao, por_decada) menos agressivo que deixa o heatmap abaixo de LIMITE_CELULAS_HEATMAP
+    n_regioes = len(set(regioes.get(pais, REGIAO_AGREGADOS) for pais in tabela.index))
+    n_decadas = len(set(ano // 10 for ano in tabela.columns))
+    if tabela.shape[0] * n_decadas <= LIMITE_CELULAS_HEATMAP:
+        return False, True
+    if n_regioes * tabela.shape[1] <= LIMITE_CELULAS_HEATMAP:
+        return True, False
+    return True, True
+
+# --- 6. MOTOR DE CORRELAÇÃO ---
+class MotorCorrelacao:
+    # Estatísticas suficientes da correlação de Pearson "pairwise-complete" (mesma semântica de DataFrame.corr),
+    # calculadas uma vez por carga de dados. Para cada par de indicadores (i, j) e cada célula (país, ano):
+    # n = m_i·m_j, s = x_i·m_i·m_j, q = x_i²·m_i·m_j, c = x_i·x_j·m_i·m_j (m = 1 onde há dado).
+    # Guardadas como somas acumuladas ao longo dos anos, qualquer janela de anos custa uma subtração e qualquer
+    # subconjunto de países uma soma vetorizada, sem revisitar os dados.
+    # A memória cresce com países × anos × indicadores²: cada estatística é acumulada no próprio array de saída
+    # (sem temporários do tamanho dela) e `n` é omitida quando não há faltas. As somas ficam em float64: uma
+    # janela curta é a diferença de duas somas longas e, em float32, o cancelamento apaga o sinal.
+
+    def __init__(self, painel, tamanho_cache=TAMANHO_CACHE_CORRELACAO):
+        # Só os indicadores-base: os derivados são transformações deles e multiplicariam o custo por par
+        indicadores, i_indicadores = painel.indices_indicadores(painel.indicadores_base)
+        with medir('correlacao_estatisticas') as info:
+            self.indicadores = indicadores
+            self.idx_pais = painel.idx_pais
+            self.anos = painel.anos
+            # Estatísticas sempre em float64, mesmo com o painel em float32 (somas longas perdem precisão)
+            valores = painel.valores[:, :, fatia_ou_indices(i_indicadores)].astype(np.float64)
+            presente = ~np.isnan(valores)
+            # Centraliza e escala cada indicador (Pearson é invariante a isso) para evitar cancelamento numérico
+            m = presente.astype(float)
+            contagem = np.maximum(m.sum(axis=(0, 1)), 1.0)
+            media = np.where(presente, valores, 0.0).sum(axis=(0, 1)) / contagem
+            escala = np.sqrt(np.where(presente, (valores - media) ** 2, 0.0).sum(axis=(0, 1)) / contagem)
+            escala = np.where(escala > 0, escala, 1.0)
+            x = np.where(presente, (valores - media) / escala, 0.0)
+            # Sem faltas, n de qualquer par é o número de células país-ano da janela: não precisa ser guardada
+            self.sem_faltas = bool(presente.all())
+            self.acumulados = {
+                's': self._acumular_produto(x, m),
+                'q': self._acumular_produto(x * x, m),
+                'c': self._acumular_produto(x, x),
+            }
+            if not self.sem_faltas:
+                self.acumulados['n'] = self._acumular_produto(m, m)
+            self.linhas_com_dado = self._acumular(presente.any(axis=2).astype(float))
+            info['linhas'] = len(self.idx_pais) * len(self.anos)
+            info['bytes'] = sum(arr.nbytes for arr in self.acumulados.values()) + self.linhas_com_dado.nbytes
+        self.matriz = functools.lru_cache(maxsize=tamanho_cache)(self._calcular_matriz)
+
+    @staticmethod
+    def _acumular(arr):
+        # Soma acumulada com um zero à frente: janela [a0, a1] = acum[:, a1 + 1] - acum[:, a0]
+        zeros = np.zeros((arr.shape[0], 1) + arr.shape[2:])
+        return np.concatenate([zeros, np.cumsum(arr, axis=1)], axis=1)
+
+    @staticmethod
+    def _acumular_produto(a, b):
+        # Igual a _acumular(einsum('pai,paj->paij', a, b)), mas escrita direto no array de saída,
+        # sem os temporários do produto e da concatenação
+        acumulado = np.zeros((a.shape[0], a.shape[1] + 1, a.shape[2], b.shape[2]))
+        np.einsum('pai,paj->paij', a, b, out=acumulado[:, 1:])
+        np.cumsum(acumulado[:, 1:], axis=1, out=acumulado[:, 1:])
+        return acumulado
+
+    def _somar(self, acumulado, i_paises, a0, a1):
+        return (acumulado[i_paises, a1 + 1] - acumulado[i_paises, a0]).sum(axis=0)
+
+    def correlacao(self, paises, ano_inicio, ano_fim=None):
+        # Normaliza a chave (conjunto de países, janela) antes de consultar o cache LRU
+        ano_fim = ano_inicio if ano_fim is None else ano_fim
+        chave_paises = tuple(sorted(p for p in set(paises) if p in self.idx_pais))
+        return self.matriz(chave_paises, max(int(ano_inicio), self.anos[0]), min(int(ano_fim), self.anos[-1]))
+
+    def _calcular_matriz(self, paises, ano_inicio, ano_fim):
+        # Retorna (matriz de correlação dos indicadores com dados na janela, nº de linhas país-ano com algum dado)
+        with medir('correlacao_matriz') as info:
+            i_paises = np.array([self.idx_pais[p] for p in paises], dtype=int)
+            a0, a1 = self.anos.index(ano_inicio), self.anos.index(ano_fim)
+            if len(i_paises) == 0 or a0 > a1:
+                return pd.DataFrame(), 0
+            s, q, c = (self._somar(self.acumulados[nome], i_paises, a0, a1) for nome in ('s', 'q', 'c'))
+            if self.sem_faltas:
+                n = np.full(s.shape, float(len(i_paises) * (a1 - a0 + 1)))
+            else:
+                n = self._somar(self.acumulados['n'], i_paises, a0, a1)
+            n_linhas = int(round(self._somar(self.linhas_com_dado, i_paises, a0, a1)))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov = n * c - s * s.T
+                var = n * q - s * s
+                r = cov / np.sqrt(var * var.T)
+            r = np.where((n >= 2) & (var > 0) & (var.T > 0), np.clip(r, -1.0, 1.0), np.nan)
+            com_dados = [k for k in range(len(self.indicadores)) if n[k, k] > 0]
+            rotulos = [self.indicadores[k] for k in com_dados]
+            info['linhas'] = n_linhas
+            return pd.DataFrame(r[np.ix_(com_dados, com_dados)], index=rotulos, columns=rotulos), n_linhas
+
+# --- 7. CACHE EM DISCO DO PAINEL PROCESSADO ---
+# Índice de impressões digitais: {caminho absoluto: (resultado do os.stat, impressão)}, uma entrada por arquivo.
+# Um arquivo só é relido para o hash quando tamanho, mtime, ctime ou inode mudam.
+_impressoes_por_stat = {}
+
+def impressao_digital_arquivo(caminho_arquivo):
+    # Tamanho, mtime e hash do conteúdo: detecta alterações mesmo quando o mtime é preservado (cp -p, rsync),
+    # já que o ctime muda mesmo nesses casos
+    try:
+        info = os.stat(caminho_arquivo)
+    except OSError:
+        return None
+    caminho_absoluto = os.path.abspath(caminho_arquivo)
+    chave_stat = (info.st_size, info.st_mtime_ns, info.st_ctime_ns, info.st_ino)
+    stat_anterior, impressao = _impressoes_por_stat.get(caminho_absoluto, (None, None))
+    if stat_anterior != chave_stat:
+        sha = hashlib.sha256()
+        with open(caminho_arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloco)
+        impressao = {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns, 'sha256': sha.hexdigest()}
+        _impressoes_por_stat[caminho_absoluto] = (chave_stat, impressao)
+    return impressao
+
+def chave_cache_painel(fontes, paises_interesse_original_wb, anos_range_tuple, mapa_nomes):
+    componentes = {
+        'versao_formato': VERSAO_FORMATO_CACHE,
+        'anos_range': list(anos_range_tuple),
+        'paises': None if paises_interesse_original_wb is None else list(paises_interesse_original_wb),
+        'mapa_nomes': mapa_nomes,
+        'fontes': [[nome_indicador, caminho_arquivo, membro_zip, impressao_digital_arquivo(caminho_arquivo)]
+                   for nome_indicador, (caminho_arquivo, membro_zip) in fontes.items()],
+    }
+    serializado = json.dumps(componentes, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()[:32]
+
+def caminhos_cache_painel(chave):
+    base = os.path.join(CAMINHO_PASTA_CACHE, f"painel_{chave}")
+    return base + ".feather", base + ".json"
+
+def ler_cache_painel(chave):
+    caminho_dados, caminho_meta = caminhos_cache_painel(chave)
+    if not (os.path.exists(caminho_dados) and os.path.exists(caminho_meta)):
+        return None
+    try:
+        with open(caminho_meta, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('chave') != chave:
+            return None
+        # Arrow IPC sem compressão: a leitura é feita por memory-map, sem parsing
+        from pyarrow import feather
+        with medir('cache_disco_leitura') as info:
+            df = feather.read_table(caminho_dados, memory_map=True).to_pandas()
+            info['linhas'], info['bytes'] = len(df), os.path.getsize(caminho_dados)
+        return df, meta.get('mensagens', [])
+    except Exception as e:
+        print(f"AVISO: Cache em disco '{caminho_dados}' ilegível, os CSVs serão relidos: {e}")
+        return None
+
+def gravar_cache_painel(chave, df, mensagens_status):
+    caminho_dados, caminho_meta = caminhos_cache_painel(chave)
+    try:
+        os.makedirs(CAMINHO_PASTA_CACHE, exist_ok=True)
+        # Grava em arquivo temporário e renomeia: réplicas concorrentes nunca leem um cache pela metade
+        sufixo_tmp = f".tmp{os.getpid()}"
+        with medir('cache_disco_gravacao') as info:
+            df.to_feather(caminho_dados + sufixo_tmp, compression='uncompressed')
+            info['linhas'], info['bytes'] = len(df), os.path.getsize(caminho_dados + sufixo_tmp)
+        with open(caminho_meta + sufixo_tmp, 'w', encoding='utf-8') as f:
+            json.dump({'chave': chave, 'mensagens': mensagens_status}, f, ensure_ascii=False)
+        os.replace(caminho_dados + sufixo_tmp, caminho_dados)
+        os.replace(caminho_meta + sufixo_tmp, caminho_meta)
+    except Exception as e:
+        print(f"AVISO: Não foi possível gravar o cache em disco em '{CAMINHO_PASTA_CACHE}': {e}")
+        return
+    remover_caches_antigos(chave)
+
+def remover_caches_antigos(chave_atual):
+    # Cada alteração dos dados gera uma chave nova: sem limpeza a pasta cresceria a cada recarga.
+    # Temporários (.tmp<pid>) de gravações em andamento não são tocados.
+    mantidos = {os.path.basename(caminho) for caminho in caminhos_cache_painel(chave_atual)}
+    try:
+        nomes = os.listdir(CAMINHO_PASTA_CACHE)
+    except OSError:
+        return
+    for nome in nomes:
+        if nome.startswith("painel_") and nome.endswith((".feather", ".json")) and nome not in mantidos:
+            try:
+                os.remove(os.path.join(CAMINHO_PASTA_CACHE, nome))
+            except OSError as e:
+                print(f"AVISO: Não foi possível remover o cache antigo '{nome}': {e}")
+
+def ler_fontes_modo_padrao(fontes):
+    # Lê as fontes para o modo padrão (países de interesse, ANOS_RANGE); devolve [(df ou None, mensagem)]
+    def ler_arquivo(item):
+        nome_indicador, (caminho_arquivo, membro_zip) = item
+        return ler_csv_local(caminho_arquivo, nome_indicador, PAISES_INTERESSE_WB_ORIGINAL, ANOS_RANGE, MAPA_NOMES_PAISES, membro_zip=membro_zip)
+
+    # Leituras concorrentes (o parser C do pandas libera o GIL); map preserva a ordem das mensagens
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS_LEITURA, max(1, len(fontes)))) as executor:
+        return list(executor.map(ler_arquivo, fontes.items()))
+
+def construir_painel_dos_csvs(fontes):
+    lista_dfs_carregados = []
+    mensagens_status = []
+
+    resultados = ler_fontes_modo_padrao(fontes)
+    for df_indicador, msg in resultados:
+        mensagens_status.append(msg)
+        if df_indicador is not None and not df_indicador.empty:
+            lista_dfs_carregados.append(df_indicador)
+    
+    anos_todos = list(range(ANOS_RANGE[0], ANOS_RANGE[1] + 1))
+    if not lista_dfs_carregados:
+        print("Nenhum DataFrame de indicador foi carregado de arquivos.")
+
+    painel = PainelIndicadores.de_series_longas(lista_dfs_carregados, PAISES_DASHBOARD, anos_todos)
+    return painel, mensagens_status
+
+# --- 8. CARGA DOS PAINÉIS ---
+def carregar_painel(fontes=None):
+    # Painel do modo padrão (países de interesse, ANOS_RANGE): do cache em disco ou relido dos arquivos
+    with medir('carga_painel'):
+        fontes = listar_fontes_indicadores() if fontes is None else fontes
+        chave = chave_cache_painel(fontes, PAISES_INTERESSE_WB_ORIGINAL, ANOS_RANGE, MAPA_NOMES_PAISES)
+        em_cache = ler_cache_painel(chave)
+        contar('cache_consultas_total', cache='disco', resultado='hit' if em_cache is not None else 'miss')
+        if em_cache is not None:
+            df_final, mensagens_status = em_cache
+            print(f"Painel lido do cache em disco (chave {chave}).")
+            painel = PainelIndicadores.de_dataframe(df_final)
+            painel.versao = chave
+            mensagens_status = mensagens_status + [f"ℹ️ Painel lido do cache em disco ({CAMINHO_PASTA_CACHE}), arquivos de dados inalterados."]
+        else:
+            painel, mensagens_status = construir_painel_dos_csvs(fontes)
+            painel.versao = chave
+            if painel.indicadores:
+                gravar_cache_painel(chave, painel.para_dataframe(), mensagens_status)
+        # O cache em disco guarda só os indicadores-base; os derivados são recalculados a cada carga
+        painel = com_indicadores_derivados(painel)
+    definir('painel_bytes', painel.valores.nbytes, painel='padrao')
+    return painel, mensagens_status
+
+def criar_painel_completo(fontes=None):
+    # Painel de todas as entidades e anos; só a lista de países é lida agora, os indicadores sob demanda
+    fontes = listar_fontes_indicadores() if fontes is None else fontes
+    chave = chave_cache_painel(fontes, None, ANOS_RANGE_COMPLETO, MAPA_NOMES_PAISES)
+    nomes_originais, regioes = ler_universo_paises(fontes)
+    paises = sorted(set(MAPA_NOMES_PAISES.get(nome, nome) for nome in nomes_originais))
+    anos = list(range(ANOS_RANGE_COMPLETO[0], ANOS_RANGE_COMPLETO[1] + 1))
+    painel = PainelSobDemanda(paises, anos, fontes, versao=f"completo-{chave}", regioes=regioes)
+    # O cubo do modo ampliado é alocado inteiro aqui; a carga sob demanda só preenche as colunas
+    definir('painel_bytes', painel.valores.nbytes, painel='completo')
+    return painel
+
+def assinatura_pastas_dados():
+    # Nome, tamanho, mtime e ctime de cada arquivo das pastas de dados: só os.scandir, sem abrir nenhum arquivo
+    itens = []
+    for pasta in (CAMINHO_PASTA_ZIPS, CAMINHO_PASTA_DADOS):
+        try:
+            entradas = os.scandir(pasta)
+        except OSError:
+            continue
+        with entradas:
+            for entrada in entradas:
+                if entrada.is_file():
+                    info = entrada.stat()
+                    itens.append((entrada.path, info.st_size, info.st_mtime_ns, info.st_ctime_ns))
+    return tuple(sorted(itens))
+
+def impressoes_fontes(fontes):
+    # {nome_indicador: (arquivo, membro, sha256)}: o que precisa mudar para o indicador ser relido
+    # (um `touch` muda o mtime, mas não o conteúdo)
+    impressoes = {}
+    for nome_indicador, (caminho_arquivo, membro_zip) in fontes.items():
+        impressao = impressao_digital_arquivo(caminho_arquivo)
+        impressoes[nome_indicador] = (caminho_arquivo, membro_zip, impressao and impressao['sha256'])
+    return impressoes
+
+class CarregadorIncremental:
+    # Mantém os painéis em dia com os arquivos de dados, sem TTL. A cada pedido (no máximo uma verificação a cada
+    # INTERVALO_VERIFICACAO_ARQUIVOS segundos) compara uma assinatura barata das pastas de dados. Se ela mudou,
+    # relista as fontes, compara as impressões digitais por indicador e relê só os indicadores adicionados ou
+    # alterados. O painel novo substitui o anterior numa única troca de referência: quem já tem o painel antigo
+    # termina a execução com ele, e cada sessão passa a ver a nova versão na próxima execução da página.
+    # Verificação por polling (a biblioteca padrão não tem inotify); o custo é um os.scandir por pasta.
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.ultima_verificacao = time.monotonic()
+        self.assinatura = assinatura_pastas_dados()
+        self.fontes = listar_fontes_indicadores()
+        self.impressoes = impressoes_fontes(self.fontes)
+        painel, mensagens = carregar_painel(self.fontes)
+        self.mensagens_por_indicador = dict(zip(self.fontes, mensagens))
+        self.estado = (painel, mensagens)
+        self.painel_ampliado = None
+
+    def painel_padrao(self):
+        # (painel, mensagens) da versão atual dos arquivos
+        recarregou = self.verificar_alteracoes()
+        contar('cache_consultas_total', cache='carregar_todos_os_dados', resultado='miss' if recarregou else 'hit')
+        return self.estado
+
+    def painel_completo(self):
+        self.verificar_alteracoes()
+        with self.trava:
+            if self.painel_ampliado is None:
+                self.painel_ampliado = criar_painel_completo(self.fontes)
+            return self.painel_ampliado
+
+    def verificar_alteracoes(self):
+        # True se algum indicador foi relido. Se outra sessão já está verificando, segue com a versão atual.
+        agora = time.monotonic()
+        if agora - self.ultima_verificacao < INTERVALO_VERIFICACAO_ARQUIVOS or not self.trava.acquire(blocking=False):
+            return False
+        try:
+            self.ultima_verificacao = agora
+            assinatura = assinatura_pastas_dados()
+            if assinatura == self.assinatura:
+                return False
+            self.assinatura = assinatura
+            fontes = listar_fontes_indicadores()
+            impressoes = impressoes_fontes(fontes)
+            alterados = [nome for nome in fontes if impressoes[nome] != self.impressoes.get(nome)]
+            # Arquivo apagado (a fonte continua listada, mas sem impressão digital): o indicador sai do painel,
+            # como no modo ampliado, em vez de cair na leitura falha e manter a coluna antiga
+            apagados = [nome for nome in alterados if impressoes[nome][2] is None]
+            alterados = [nome for nome in alterados if nome not in apagados]
+            removidos = [nome for nome in self.impressoes if nome not in fontes] + apagados
+            if not alterados and not removidos and list(fontes) == list(self.fontes):
+                self.impressoes = impressoes
+                return False
+            with medir('recarga_incremental') as info:
+                self._atualizar_padrao(fontes, alterados, removidos)
+                if self.painel_ampliado is not None:
+                    anterior = self.painel_ampliado
+                    novo = criar_painel_completo(fontes)
+                    novo.herdar_colunas(anterior, [nome for nome in novo.indicadores_base
+                                                   if nome not in alterados and nome not in removidos])
+                    self.painel_ampliado = novo
+                info['linhas'] = len(alterados)
+            self.fontes, self.impressoes = fontes, impressoes
+            contar('indicadores_recarregados_total', len(alterados))
+            print(f"Arquivos de dados alterados: {len(alterados)} indicador(es) relido(s), {len(removidos)} removido(s).")
+            return True
+        finally:
+            self.trava.release()
+
+    def _atualizar_padrao(self, fontes, alterados, removidos):
+        # Novo cubo com as colunas do painel atual para os indicadores inalterados e as relidas para os demais
+        painel_atual, _ = self.estado
+        a_ler = {nome: fontes[nome] for nome in alterados}
+        lidos = dict(zip(a_ler, ler_fontes_modo_padrao(a_ler))) if a_ler else {}
+        indicadores, colunas = [], []
+        for nome in fontes:
+            caminho_arquivo, _ = fontes[nome]
+            if nome in removidos or (nome in lidos and not os.path.exists(caminho_arquivo)):
+                # Arquivo apagado (inclusive entre a verificação e a leitura): sem coluna
+                self.mensagens_por_indicador[nome] = (f"❌ ARQUIVO NÃO ENCONTRADO: {os.path.abspath(caminho_arquivo)}. "
+                                                      f"Indicador '{nome}' removido do painel.")
+                continue
+            if nome in lidos and lidos[nome][0] is not None and not lidos[nome][0].empty:
+                df_indicador, msg = lidos[nome]
+                self.mensagens_por_indicador[nome] = msg
+                indicadores.append(nome)
+                colunas.append(df_indicador)
+                continue
+            if nome in lidos:
+                # Leitura falhou com o arquivo presente (ex.: pego no meio de uma gravação): a coluna atual
+                # continua valendo até a próxima leitura bem-sucedida, que ocorre quando o arquivo mudar de novo
+                msg = lidos[nome][1]
+                if nome in painel_atual.idx_indicador:
+                    msg = f"⚠️ '{nome}' não pôde ser relido; mantidos os dados da leitura anterior. Detalhe: {msg}"
+                self.mensagens_por_indicador[nome] = msg
+            if nome in painel_atual.idx_indicador:
+                indicadores.append(nome)
+                colunas.append(painel_atual.idx_indicador[nome])
+        for nome in removidos:
+            if nome not in fontes:
+                self.mensagens_por_indicador.pop(nome, None)
+
+        valores = np.full((len(painel_atual.paises), len(painel_atual.anos), len(indicadores)), np.nan)
+        indice_paises, indice_anos = pd.Index(painel_atual.paises), pd.Index(painel_atual.anos)
+        for k, coluna in enumerate(colunas):
+            if isinstance(coluna, int):
+                valores[:, :, k] = painel_atual.valores[:, :, coluna]
+            else:
+                PainelIndicadores.preencher_indicador(valores, k, coluna, indice_paises, indice_anos)
+        painel = PainelIndicadores(painel_atual.paises, painel_atual.anos, indicadores,
+                                   valores.astype(tipo_compacto(valores), copy=False), regioes=painel_atual.regioes)
+        painel.versao = chave_cache_painel(fontes, PAISES_INTERESSE_WB_ORIGINAL, ANOS_RANGE, MAPA_NOMES_PAISES)
+        mensagens = [self.mensagens_por_indicador[nome] for nome in fontes]
+        if painel.indicadores:
+            gravar_cache_painel(painel.versao, painel.para_dataframe(), mensagens)
+        painel = com_indicadores_derivados(painel)
+        definir('painel_bytes', painel.valores.nbytes, painel='padrao')
+        descricao = ", ".join(alterados) if alterados else "nenhum"
+        self.estado = (painel, mensagens + [f"ℹ️ Arquivos de dados alterados: indicadores relidos: {descricao}; removidos: {len(removidos)}."])
+
+
+# --- 9. LINHA DE COMANDO: VALIDAÇÃO E PRÉ-AQUECIMENTO DO CACHE ---
+def validar_fontes(fontes):
+    # Lê cada arquivo inteiro (todas as entidades e anos, como o modo ampliado) e devolve as mensagens de
+    # falha: arquivo ausente ou ilegível, cabeçalho fora do formato do Banco Mundial ou nenhum valor válido
+    def validar(item):
+        nome_indicador, (caminho_arquivo, membro_zip) = item
+        _, msg = ler_csv_local(caminho_arquivo, nome_indicador, None, ANOS_RANGE_COMPLETO, MAPA_NOMES_PAISES, membro_zip=membro_zip)
+        return msg
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS_LEITURA, max(1, len(fontes)))) as executor:
+        mensagens = list(executor.map(validar, fontes.items()))
+    return [msg for msg in mensagens if not msg.startswith("✔️")]
+
+def main(argv=None):
+    try:
+        return preparar_dados(argv)
+    finally:
+        # Tempos da validação e da carga, para o node exporter (o servidor sobrescreve depois com os seus)
+        metricas.REGISTRO.gravar()
+
+def preparar_dados(argv=None):
+    parser = argparse.ArgumentParser(description="Valida os arquivos de dados e pré-aquece o cache em disco do dashboard.")
+    parser.add_argument('--sem-validacao', action='store_true',
+                        help="Só pré-aquece o cache, sem reler cada arquivo por inteiro.")
+    args = parser.parse_args(argv)
+    inicio = time.perf_counter()
+
+    fontes = listar_fontes_indicadores()
+    if not fontes:
+        print(f"❌ Nenhum arquivo de dados encontrado em '{CAMINHO_PASTA_ZIPS}' ou '{CAMINHO_PASTA_DADOS}'.")
+        return 1
+    if not args.sem_validacao:
+        falhas = validar_fontes(fontes)
+        if falhas:
+            print(f"❌ {len(falhas)} de {len(fontes)} arquivos de dados com problemas:")
+            for msg in falhas:
+                print(f"  {msg}")
+            return 1
+        print(f"✔️ {len(fontes)} arquivos de dados validados.")
+
+    painel, _ = carregar_painel()
+    if not painel.indicadores:
+        print("❌ Nenhum indicador carregado para o painel do dashboard.")
+        return 1
+    print(f"✔️ Cache em disco pronto em '{CAMINHO_PASTA_CACHE}' ({len(painel.indicadores)} indicadores, "
+          f"chave {painel.versao}) em {time.perf_counter() - inicio:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
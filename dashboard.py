@@ -1,366 +1,478 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
-import time
-import os
+import functools
+import dados
+import metricas
+from dados import (
+    ModuloSobDemanda, np, pd, MotorCorrelacao, agregar_tabela_serie, nivel_agregacao_sugerido, nome_derivado,
+    ANOS_RANGE_COMPLETO, LIMITE_CELULAS_HEATMAP, REGIAO_AGREGADOS, DERIVACOES,
+)
 
-# --- 0. CONFIGURAÇÃO DA PÁGINA STREAMLIT ---
-st.set_page_config(layout="wide", page_title="Dashboard Macroeconômico Comparativo")
+# Plotly só é importado quando a primeira figura é montada
+px = ModuloSobDemanda("plotly.express")
 
 # --- 1. CONFIGURAÇÕES ---
-CAMINHO_PASTA_DADOS = "dados_baixados"
-PAISES_INTERESSE_WB_ORIGINAL = [
-    'Brazil', 'United States', 'Germany', 'Korea, Rep.', 'China', 'India',
-    'South Africa', 'Russian Federation', 'Mexico', 'Argentina', 'Chile',
-    'Colombia', 'Ireland', 'Vietnam'
-]
-MAPA_NOMES_PAISES = {
-    'Korea, Rep.': 'Coreia do Sul',
-    'United States': 'EUA',
-    'Russian Federation': 'Rússia',
-    'Brazil': 'Brasil'
-}
-
-PAISES_DASHBOARD = sorted([MAPA_NOMES_PAISES.get(p, p) for p in PAISES_INTERESSE_WB_ORIGINAL])
-ANOS_RANGE = (2010, 2023)
-
-# --- 2. FUNÇÕES PARA PROCESSAMENTO DE DADOS ---
-# (As funções de processamento de dados permanecem as mesmas, não precisam de alteração)
-def processar_df_banco_mundial(df_raw, nome_novo_indicador, paises_interesse_original_wb, anos_range_tuple, mapa_nomes):
-    cols_anos = [str(ano) for ano in range(anos_range_tuple[0], anos_range_tuple[1] + 1)]
-    cols_anos_existentes = [col for col in cols_anos if col in df_raw.columns]
-    
-    if 'Country Name' not in df_raw.columns:
-        print(f"AVISO: Coluna 'Country Name' não encontrada no arquivo para {nome_novo_indicador}.")
-        return pd.DataFrame(columns=['País', 'Ano', nome_novo_indicador])
-        
-    if not cols_anos_existentes:
-        print(f"AVISO: Nenhuma coluna de ano no intervalo {anos_range_tuple} encontrada para {nome_novo_indicador}. Países no arquivo: {df_raw['Country Name'].unique()[:5]}")
-        return pd.DataFrame(columns=['País', 'Ano', nome_novo_indicador])
-
-    cols_to_keep = ['Country Name'] + cols_anos_existentes
-    df_processed_subset = df_raw[cols_to_keep]
-    df_processed_subset = df_processed_subset[df_processed_subset['Country Name'].isin(paises_interesse_original_wb)]
-    
-    if df_processed_subset.empty:
-        return pd.DataFrame(columns=['País', 'Ano', nome_novo_indicador])
-
-    df_long = pd.melt(df_processed_subset, id_vars=['Country Name'], value_vars=cols_anos_existentes,
-                      var_name='Ano', value_name=nome_novo_indicador)
-    
-    df_long['Ano'] = pd.to_numeric(df_long['Ano'])
-    df_long[nome_novo_indicador] = pd.to_numeric(df_long[nome_novo_indicador], errors='coerce')
-    
-    df_long['País'] = df_long['Country Name'].map(mapa_nomes).fillna(df_long['Country Name'])
-    df_long = df_long.drop(columns=['Country Name'])
-    
-    return df_long[['País', 'Ano', nome_novo_indicador]]
-
-def ler_csv_local(caminho_arquivo, nome_novo_indicador, paises_interesse_original_wb, anos_range_tuple, mapa_nomes, skiprows=4, encoding='latin1'):
-    abs_path = os.path.abspath(caminho_arquivo)
-    print(f"Tentando ler arquivo local: {abs_path} para {nome_novo_indicador}...")
-    try:
-        df_raw = pd.read_csv(caminho_arquivo, skiprows=skiprows, encoding=encoding)
-        df_processed = processar_df_banco_mundial(df_raw, nome_novo_indicador, paises_interesse_original_wb, anos_range_tuple, mapa_nomes)
-        
-        if df_processed.empty:
-            msg = f"ℹ️ Nenhum dado processado para '{nome_novo_indicador}' do arquivo '{os.path.basename(caminho_arquivo)}' para os países/anos de interesse."
-            if 'Country Name' in df_raw.columns and df_raw['Country Name'].isin(paises_interesse_original_wb).any():
-                msg = f"⚠️ Países de interesse existem em '{os.path.basename(caminho_arquivo)}' para '{nome_novo_indicador}', mas o processamento resultou em dados vazios (verifique anos/valores no CSV)."
-            print(msg)
-            return None, msg
-        
-        msg = f"✔️ '{nome_novo_indicador}' lido do arquivo: {os.path.basename(caminho_arquivo)}"
-        print(msg)
-        return df_processed, msg
-    except FileNotFoundError:
-        error_message = f"❌ ARQUIVO NÃO ENCONTRADO: {abs_path}. Indicador '{nome_novo_indicador}' não será carregado."
-        print(error_message)
-        return None, error_message
-    except Exception as e:
-        error_message = f"❌ Erro ao ler ou processar {abs_path} para '{nome_novo_indicador}': {e}. Indicador não será carregado."
-        print(error_message)
-        return None, error_message
-
-arquivos_a_carregar = {
-    'banco_mundial_pib_per_capita_ppp.csv': 'PIB per capita (PPP Dólar)',
-    'banco_mundial_gasto_educ_perc_pib.csv': 'Gasto em Educação (% PIB)',
-    'banco_mundial_industria_perc_pib.csv': 'Indústria (% PIB)',
-    'banco_mundial_manuf_export_perc.csv': 'Manufaturados nas Exportações (%)',
-    'banco_mundial_manufatura_perc_pib.csv': 'Manufatura (% PIB)',
-    'banco_mundial_gasto_pd_perc_pib.csv': 'Gasto em P&D (% PIB)',
-    'banco_mundial_gasto_gov_educ_total.csv': 'Gasto Gov. Educação (% Gasto Gov.)'
-}
-
-@st.cache_data(ttl=3600)
+# Configurações de dados (pastas, países, anos, caches) ficam em dados.py
+# Acima deste tamanho os rótulos das células do heatmap são omitidos
+LIMITE_CELULAS_ROTULOS = 400
+# Figuras Plotly prontas, por tipo de gráfico, compartilhadas entre sessões (LRU)
+TAMANHO_CACHE_FIGURAS = 256
+
+# --- 2. DADOS (CACHE DO STREAMLIT SOBRE dados.py) ---
+@st.cache_resource
+def obter_carregador():
+    # Um carregador por processo, compartilhado por todas as sessões. Sem TTL: ele mesmo verifica os arquivos
+    # de dados e relê só os indicadores alterados, trocando o painel por uma nova versão.
+    return dados.CarregadorIncremental()
+
 def carregar_todos_os_dados():
-    lista_dfs_carregados = []
-    mensagens_status = []
-    
-    for nome_arquivo, nome_indicador in arquivos_a_carregar.items():
-        caminho_completo = os.path.join(CAMINHO_PASTA_DADOS, nome_arquivo)
-        df_indicador, msg = ler_csv_local(caminho_completo, nome_indicador, PAISES_INTERESSE_WB_ORIGINAL, ANOS_RANGE, MAPA_NOMES_PAISES)
-        mensagens_status.append(msg)
-        if df_indicador is not None and not df_indicador.empty:
-            lista_dfs_carregados.append(df_indicador)
-    
-    anos_todos = list(range(ANOS_RANGE[0], ANOS_RANGE[1] + 1))
-    df_final = pd.DataFrame([(pais, ano) for pais in PAISES_DASHBOARD for ano in anos_todos], columns=['País', 'Ano'])
-
-    if not lista_dfs_carregados:
-        print("Nenhum DataFrame de indicador foi carregado de arquivos.")
-        return df_final, mensagens_status
-
-    for df_to_merge in lista_dfs_carregados:
-        df_to_merge['Ano'] = pd.to_numeric(df_to_merge['Ano'], errors='coerce').dropna().astype(int)
-        df_to_merge = df_to_merge.dropna(subset=['País'])
-        df_to_merge = df_to_merge.drop_duplicates(subset=['País', 'Ano'], keep='last')
-        df_final = pd.merge(df_final, df_to_merge, on=['País', 'Ano'], how='left')
-    
-    df_final = df_final.sort_values(by=['País', 'Ano']).reset_index(drop=True)
-    return df_final, mensagens_status
+    # (painel somente leitura da versão atual, mensagens de carregamento)
+    return obter_carregador().painel_padrao()
+
+def obter_painel_completo():
+    return obter_carregador().painel_completo()
+
+@st.cache_resource(max_entries=2)
+def obter_motor_correlacao(versao_dados, _painel):
+    # Um motor por versão dos dados, compartilhado entre sessões (o cache LRU das matrizes fica nele)
+    return MotorCorrelacao(_painel)
+
+
+# --- 3. FIGURAS (CACHE COMPARTILHADO ENTRE SESSÕES) ---
+# Cada figura é identificada pelas entradas exatas do gráfico mais a versão dos dados; os argumentos com "_"
+# (painel, tabelas já calculadas) não entram na chave porque são determinados por ela.
+# O cache do Streamlit é limitado a max_entries e descarta as entradas menos usadas recentemente.
+
+def medir_construcao(tipo):
+    # Tempo de construção de cada figura; acertos do cache do Streamlit não executam a função e não contam
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def construir(*args, **kwargs):
+            with metricas.medir('figura', tipo=tipo):
+                return funcao(*args, **kwargs)
+        return construir
+    return decorador
+
+@st.cache_resource(max_entries=TAMANHO_CACHE_FIGURAS, show_spinner=False)
+@medir_construcao('barras')
+def figura_barras(versao_dados, indicador, paises, ano, _painel):
+    df_barras_valid = _painel.fatia_ano(ano, paises, [indicador]).dropna(subset=[indicador])
+    if df_barras_valid.empty:
+        return None
+    fig_barras = px.bar(df_barras_valid.sort_values(by=indicador, ascending=False),
+                        x='País', y=indicador, color='País',
+                        title=f"{indicador} em {ano}")
+    # AJUSTE RESPONSIVO
+    fig_barras.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        font=dict(size=10)
+    )
+    return fig_barras
+
+@st.cache_resource(max_entries=TAMANHO_CACHE_FIGURAS, show_spinner=False)
+@medir_construcao('dispersao')
+def figura_dispersao(versao_dados, indicador_x, indicador_y, paises, ano, _painel):
+    df_scatter_valid = _painel.fatia_ano(ano, paises, [indicador_x, indicador_y]).dropna(subset=[indicador_x, indicador_y])
+    if df_scatter_valid.empty:
+        return None
+    # Tamanho do marcador proporcional ao eixo X só se não houver valores negativos (ex.: taxas de crescimento)
+    tamanho_marcador = indicador_x if (df_scatter_valid[indicador_x] >= 0).all() else None
+    fig_dispersao = px.scatter(df_scatter_valid, x=indicador_x, y=indicador_y, color='País',
+                               size=tamanho_marcador, hover_name='País',
+                               title=f"Correlação: {indicador_x} vs. {indicador_y} ({ano})")
+    # AJUSTE RESPONSIVO: Removido 'text' para evitar poluição e ajustado layout
+    fig_dispersao.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        font=dict(size=10)
+    )
+    return fig_dispersao
+
+@st.cache_resource(max_entries=TAMANHO_CACHE_FIGURAS, show_spinner=False)
+@medir_construcao('evolucao')
+def figura_evolucao(versao_dados, pais, indicador, _painel):
+    df_indicador_especifico = _painel.serie_pais(pais, [indicador]).dropna(subset=[indicador])
+    if df_indicador_especifico.empty:
+        return None
+    fig_individual = px.line(df_indicador_especifico, x='Ano', y=indicador,
+                             title=f"Evolução de {indicador} para {pais}", markers=True)
+    # AJUSTE RESPONSIVO
+    fig_individual.update_layout(font=dict(size=10), margin=dict(l=40, r=20, t=40, b=40))
+    return fig_individual
+
+@st.cache_resource(max_entries=TAMANHO_CACHE_FIGURAS, show_spinner=False)
+@medir_construcao('heatmap_serie')
+def figura_heatmap_serie(versao_dados, indicador, paises, nivel_agregacao, rotulo_linhas, rotulo_colunas, _tabela):
+    # Rótulos por célula só em tabelas pequenas: acima do limite pesam mais que o próprio gráfico
+    rotulos_celulas = ".2f" if _tabela.size <= LIMITE_CELULAS_ROTULOS else False
+    fig_heatmap = px.imshow(_tabela, labels=dict(x=rotulo_colunas, y=rotulo_linhas, color=indicador),
+                            text_auto=rotulos_celulas, aspect="auto", color_continuous_scale=px.colors.sequential.Viridis)
+    fig_heatmap.update_xaxes(side="bottom")
+    fig_heatmap.update_layout(title_text=f"Heatmap: {indicador} ao longo dos Anos", font=dict(size=10))
+    return fig_heatmap
+
+@st.cache_resource(max_entries=TAMANHO_CACHE_FIGURAS, show_spinner=False)
+@medir_construcao('gradiente_tabela')
+def estilos_gradiente_serie(versao_dados, indicador, paises, nivel_agregacao, _tabela, cmap='viridis'):
+    # CSS equivalente a Styler.background_gradient(cmap, axis=None), calculado uma vez por chave.
+    # O Styler em si não pode ser compartilhado: o Streamlit o recalcula e altera a cada exibição.
+    from matplotlib import colormaps, colors
+    valores = _tabela.to_numpy(dtype=float)
+    rgbas = colormaps[cmap](colors.Normalize(np.nanmin(valores), np.nanmax(valores))(valores))
+    linear = np.where(rgbas[..., :3] <= 0.04045, rgbas[..., :3] / 12.92, ((rgbas[..., :3] + 0.055) / 1.055) ** 2.4)
+    luminancia = linear @ np.array([0.2126, 0.7152, 0.0722])
+    css = [[f"background-color: {colors.rgb2hex(rgba)};color: {'#f1f1f1' if lum < 0.408 else '#000000'};"
+            for rgba, lum in zip(linha_rgba, linha_lum)] for linha_rgba, linha_lum in zip(rgbas, luminancia)]
+    return pd.DataFrame(css, index=_tabela.index, columns=_tabela.columns)
+
+@st.cache_resource(max_entries=TAMANHO_CACHE_FIGURAS, show_spinner=False)
+@medir_construcao('correlacao')
+def figura_correlacao(versao_dados, paises, ano_inicio, ano_fim, _matriz_corr):
+    periodo = f"{ano_fim}" if ano_inicio == ano_fim else f"{ano_inicio}–{ano_fim}"
+    fig_corr_heatmap = px.imshow(_matriz_corr, text_auto=".2f", aspect="auto",
+                                 color_continuous_scale=px.colors.diverging.RdBu, zmin=-1, zmax=1)
+    fig_corr_heatmap.update_layout(
+        title_text=f"Matriz de Correlação ({periodo}, Países: {', '.join(paises)})",
+        font=dict(size=10) # Ajuste de fonte
+    )
+    return fig_corr_heatmap
+
+
+# --- 4. SEÇÕES DA PÁGINA (FRAGMENTOS) ---
+# Cada seção é um st.fragment: um widget dentro dela reexecuta só a própria seção.
+# Os parâmetros de cada função são as entradas globais de que a seção depende; mudá-los (filtros da barra
+# lateral, modo ampliado) reexecuta a página inteira e, com ela, todas as seções.
+
+@st.fragment
+def secao_tabela_comparativa(painel, paises_selecionados_gerais, ano_selecionado_pontual, modo_ampliado):
+    st.subheader("Tabela de Dados Comparativa")
+    indicadores_base = painel.indicadores_base
+    indicadores_tabela = indicadores_base
+    if modo_ampliado:
+        indicadores_tabela = st.multiselect(
+            "Indicadores da tabela:", indicadores_base,
+            default=indicadores_base[:min(3, len(indicadores_base))], key="indicadores_tabela_v8"
+        )
+    metricas_derivadas = st.multiselect(
+        "Métricas derivadas ao lado de cada indicador:", list(DERIVACOES), default=[], key="derivados_tabela_v8"
+    )
+    if metricas_derivadas:
+        indicadores_tabela = [nome for ind in indicadores_tabela
+                              for nome in [ind] + [nome_derivado(ind, rotulo) for rotulo in metricas_derivadas]]
+    df_filtrado_ano_pontual = painel.fatia_ano(ano_selecionado_pontual, paises_selecionados_gerais, indicadores_tabela)
+    if not df_filtrado_ano_pontual.empty and indicadores_tabela:
+        df_tabela_display = df_filtrado_ano_pontual.dropna(subset=indicadores_tabela, how='all')
+        if not df_tabela_display.empty:
+            cols_para_tabela = ['País'] + [ind for ind in indicadores_tabela if ind in df_tabela_display.columns and df_tabela_display[ind].notna().any()]
+            st.dataframe(df_tabela_display[cols_para_tabela].set_index('País').style.format(na_rep="-", precision=2))
+        else:
+            st.info(f"Nenhum país com dados para os indicadores no ano {ano_selecionado_pontual}.")
+    else:
+        st.info(f"Nenhum dado para a combinação de filtros no ano {ano_selecionado_pontual}.")
+
+@st.fragment
+def secao_grafico_barras(painel, paises_selecionados_gerais, ano_selecionado_pontual, indicadores_com_dados_ano_pontual):
+    st.subheader("Comparativo por Indicador (Gráfico de Barras)")
+    if indicadores_com_dados_ano_pontual:
+        indicador_barras = st.selectbox("Indicador:", indicadores_com_dados_ano_pontual, key="bar_ind_pontual_v8")
+        if indicador_barras:
+            fig_barras = figura_barras(painel.versao, indicador_barras, tuple(paises_selecionados_gerais), ano_selecionado_pontual, painel)
+            if fig_barras is not None:
+                st.plotly_chart(fig_barras, use_container_width=True)
+            else: st.info(f"Sem dados para '{indicador_barras}' nos filtros atuais.")
+    else: st.info("Sem indicadores com dados para este ano/seleção (gráfico de barras).")
+
+@st.fragment
+def secao_grafico_dispersao(painel, paises_selecionados_gerais, ano_selecionado_pontual, indicadores_com_dados_ano_pontual):
+    st.subheader("Análise de Correlação (Gráfico de Dispersão)")
+    indicadores_numericos_scatter = indicadores_com_dados_ano_pontual
+    if len(indicadores_numericos_scatter) >= 2:
+        idx_x = 0
+        if 'PIB per capita (PPP Dólar)' in indicadores_numericos_scatter:
+            idx_x = indicadores_numericos_scatter.index('PIB per capita (PPP Dólar)')
+
+        indicador_x_scatter = st.selectbox("Indicador Eixo X:", indicadores_numericos_scatter, index=idx_x, key="scatter_x_pontual_v8")
+        indicador_y_scatter_opcoes = [ind for ind in indicadores_numericos_scatter if ind != indicador_x_scatter]
+
+        if indicador_y_scatter_opcoes:
+            indicador_y_scatter = st.selectbox("Indicador Eixo Y:", indicador_y_scatter_opcoes, index=0, key="scatter_y_pontual_v8")
+            if indicador_x_scatter and indicador_y_scatter:
+                fig_dispersao = figura_dispersao(painel.versao, indicador_x_scatter, indicador_y_scatter,
+                                                 tuple(paises_selecionados_gerais), ano_selecionado_pontual, painel)
+                if fig_dispersao is not None:
+                    st.plotly_chart(fig_dispersao, use_container_width=True)
+                else: st.info(f"Sem dados completos para '{indicador_x_scatter}' vs '{indicador_y_scatter}'.")
+        else: st.info("Precisa de pelo menos um outro indicador para o eixo Y.")
+    else: st.info("Sem indicadores numéricos suficientes para gráfico de dispersão.")
+
+@st.fragment
+def secao_evolucao_pais(painel, paises_selecionados_gerais):
+    st.subheader("Evolução de Múltiplos Indicadores para um País")
+    pais_analise_multi_ind = st.selectbox(
+        "Selecione UM País:",
+        paises_selecionados_gerais,
+        key="pais_multi_ind_v8"
+    )
+    if pais_analise_multi_ind:
+        indicadores_pais_multi_ind = painel.indicadores_com_dados([pais_analise_multi_ind])
+
+        if indicadores_pais_multi_ind:
+            indicadores_plot_multi_ind = st.multiselect(
+                "Selecione indicadores para visualizar (um gráfico por indicador):",
+                indicadores_pais_multi_ind,
+                default=indicadores_pais_multi_ind[:min(2, len(indicadores_pais_multi_ind))],
+                key="select_multi_ind_v8"
+            )
+
+            if indicadores_plot_multi_ind:
+                for indicador in indicadores_plot_multi_ind:
+                    fig_individual = figura_evolucao(painel.versao, pais_analise_multi_ind, indicador, painel)
+                    if fig_individual is not None:
+                        st.markdown(f"#### Evolução de **{indicador}** para **{pais_analise_multi_ind}**")
+                        st.plotly_chart(fig_individual, use_container_width=True)
+                    else:
+                        st.info(f"Nenhum dado válido para o indicador '{indicador}' para {pais_analise_multi_ind}.")
+            else:
+                st.info("Selecione pelo menos um indicador para visualizar sua evolução.")
+        else:
+            st.info(f"Nenhum indicador com dados disponível para {pais_analise_multi_ind}.")
+
+@st.fragment
+def secao_serie_temporal(painel, paises_selecionados_gerais, modo_ampliado):
+    st.subheader("Série Temporal Comparativa (1 Indicador, Múltiplos Países)")
+    indicadores_com_dados_series_gerais = [ind for ind in painel.indicadores_com_dados(paises_selecionados_gerais)
+                                           if ind not in painel.derivados]
+
+    if not indicadores_com_dados_series_gerais:
+        st.info("Nenhum indicador com dados disponíveis para os países selecionados.")
+        return
+    indicador_serie_heatmap = st.selectbox(
+        "Selecione UM Indicador para Tabela de Série Temporal e Heatmap:",
+        indicadores_com_dados_series_gerais,
+        key="indicador_heatmap_v8"
+    )
+    if not indicador_serie_heatmap:
+        st.info("Selecione um indicador para a tabela e o heatmap.")
+        return
+    metrica_serie = st.selectbox("Métrica:", ["Valor"] + list(DERIVACOES), key="metrica_serie_v8")
+    if metrica_serie != "Valor":
+        indicador_serie_heatmap = nome_derivado(indicador_serie_heatmap, metrica_serie)
+
+    paises_heatmap = paises_selecionados_gerais
+    if modo_ampliado and st.checkbox("Incluir todos os países na tabela e no heatmap", key="heatmap_todos_paises_v8"):
+        paises_heatmap = None
+    df_serie_pivot_table = painel.tabela_serie(indicador_serie_heatmap, paises_heatmap)
+    chave_paises_heatmap = None if paises_heatmap is None else tuple(paises_heatmap)
+    if df_serie_pivot_table.empty:
+        st.info(f"Nenhum dado para '{indicador_serie_heatmap}' para os países selecionados no período.")
+        return
+
+    rotulo_linhas, rotulo_colunas = "País", "Ano"
+    nivel_agregacao = None
+    if df_serie_pivot_table.size > LIMITE_CELULAS_HEATMAP:
+        # Tabela grande demais para o navegador: agrega por região e/ou década, com detalhamento por região
+        niveis_heatmap = ["Países × anos", "Regiões × anos", "Países × décadas", "Regiões × décadas"]
+        por_regiao, por_decada = nivel_agregacao_sugerido(df_serie_pivot_table, painel.regioes)
+        nivel_heatmap = st.radio(
+            f"Nível de detalhe ({df_serie_pivot_table.shape[0]} países × {df_serie_pivot_table.shape[1]} anos):",
+            niveis_heatmap, index=niveis_heatmap.index(f"{'Regiões' if por_regiao else 'Países'} × {'décadas' if por_decada else 'anos'}"),
+            horizontal=True, key="nivel_heatmap_v8"
+        )
+        por_regiao, por_decada = nivel_heatmap.startswith("Regiões"), nivel_heatmap.endswith("décadas")
+        if por_regiao:
+            regioes_tabela = df_serie_pivot_table.index.map(lambda pais: painel.regioes.get(pais, REGIAO_AGREGADOS))
+            regiao_detalhe = st.selectbox(
+                "Detalhar uma região:", ["Todas as regiões"] + sorted(set(regioes_tabela)), key="regiao_heatmap_v8"
+            )
+            if regiao_detalhe != "Todas as regiões":
+                df_serie_pivot_table = df_serie_pivot_table[regioes_tabela == regiao_detalhe]
+                por_regiao = False
+        df_serie_pivot_table = agregar_tabela_serie(df_serie_pivot_table, painel.regioes if por_regiao else None, por_decada)
+        nivel_agregacao = (nivel_heatmap, regiao_detalhe if nivel_heatmap.startswith("Regiões") else None)
+        rotulo_linhas, rotulo_colunas = ("Região" if por_regiao else "País"), ("Década" if por_decada else "Ano")
+
+    st.markdown(f"**Tabela de Série Temporal para: {indicador_serie_heatmap}**")
+    if not df_serie_pivot_table.empty:
+        estilo_tabela = df_serie_pivot_table.style.format(na_rep="-", precision=2)
+        if df_serie_pivot_table.size <= LIMITE_CELULAS_HEATMAP:
+            css_gradiente = estilos_gradiente_serie(painel.versao, indicador_serie_heatmap, chave_paises_heatmap, nivel_agregacao, df_serie_pivot_table)
+            estilo_tabela = estilo_tabela.apply(lambda _: css_gradiente, axis=None)
+        st.dataframe(estilo_tabela)
+    else:
+        st.info(f"Nenhum dado para '{indicador_serie_heatmap}' após pivotar.")
 
+    st.markdown(f"**Mapa de Calor (Heatmap) para: {indicador_serie_heatmap}**")
+    if not df_serie_pivot_table.empty and df_serie_pivot_table.shape[0] > 0 and df_serie_pivot_table.shape[1] > 0:
+        fig_heatmap = figura_heatmap_serie(painel.versao, indicador_serie_heatmap, chave_paises_heatmap, nivel_agregacao,
+                                           rotulo_linhas, rotulo_colunas, df_serie_pivot_table)
+        st.plotly_chart(fig_heatmap, use_container_width=True)
+    else:
+        st.info(f"Não há dados suficientes para gerar o heatmap.")
 
-# --- CORPO PRINCIPAL DO APP STREAMLIT ---
-st.title("Análise Macroeconômica Comparativa Global 🌎")
-df_dados, mensagens_carregamento = carregar_todos_os_dados()
-
-with st.expander("Logs de Carregamento de Dados", expanded=False):
-    for msg in mensagens_carregamento:
-        if "✔️" in msg: st.success(msg)
-        elif "⚠️" in msg: st.warning(msg)
-        elif "❌" in msg: st.error(msg)
-        else: st.info(msg)
-
-if df_dados.empty or len(df_dados.columns) <= 2:
-    st.error("Não foi possível carregar dados para os indicadores. Verifique os arquivos CSV na pasta 'dados_baixados' e os logs no console.")
-else:
-    st.markdown("""
-    Este dashboard permite a análise comparativa de indicadores macroeconômicos chave.
-    Os dados são lidos de arquivos CSV locais. Indicadores/países sem dados aparecerão como 'NaN' ou podem ser omitidos dos gráficos se não houver dados válidos.
+@st.fragment
+def secao_matriz_correlacao(painel, paises_selecionados_gerais, ano_selecionado_pontual, modo_ampliado):
+    if modo_ampliado:
+        st.markdown("---")
+        # A matriz usa todos os indicadores: no modo ampliado só é montada quando pedida
+        if not st.checkbox("Calcular matriz de correlação (carrega todos os indicadores)", key="calcular_corr_v8"):
+            return
+    st.markdown("---")
+    motor_correlacao = obter_motor_correlacao(painel.versao, painel)
+    anos_anteriores_disponiveis = painel.anos.index(ano_selecionado_pontual)
+    anos_janela_corr = 0
+    if anos_anteriores_disponiveis > 0:
+        anos_janela_corr = st.slider(
+            "Anos anteriores incluídos na janela da correlação (0 = apenas o ano selecionado):",
+            min_value=0, max_value=anos_anteriores_disponiveis, value=0, key="janela_corr_v8"
+        )
+    ano_inicio_corr = painel.anos[anos_anteriores_disponiveis - anos_janela_corr]
+    periodo_corr = f"{ano_selecionado_pontual}" if ano_inicio_corr == ano_selecionado_pontual else f"{ano_inicio_corr}–{ano_selecionado_pontual}"
+
+    st.header(f"Matriz de Correlação entre Indicadores ({periodo_corr})")
+    st.markdown(f"""
+    Esta seção mostra a correlação de Pearson entre os indicadores para os **países e o ano selecionados na barra lateral**.
+    Com uma janela de vários anos, cada par país-ano da janela conta como uma observação.
+    Valores próximos de 1 indicam forte correlação positiva, próximos de -1 forte correlação negativa, e próximos de 0 pouca correlação linear.
     """)
 
+    matriz_corr, n_linhas_corr = motor_correlacao.correlacao(paises_selecionados_gerais, ano_inicio_corr, ano_selecionado_pontual)
+    if n_linhas_corr == 0:
+        st.info(f"Nenhum dado disponível para os países selecionados em {periodo_corr} para calcular correlações.")
+    elif matriz_corr.shape[1] >= 2 and n_linhas_corr >= 2:
+        fig_corr_heatmap = figura_correlacao(painel.versao, tuple(paises_selecionados_gerais), ano_inicio_corr, ano_selecionado_pontual, matriz_corr)
+        st.plotly_chart(fig_corr_heatmap, use_container_width=True)
+    else:
+        st.info(f"Não há dados ou indicadores numéricos suficientes para os filtros selecionados para calcular uma matriz de correlação (necessário ≥2 indicadores e ≥2 países com dados).")
+
+def secao_diagnostico():
+    # Métricas do processo (todas as sessões desde o início do servidor), as mesmas gravadas no arquivo .prom
+    with st.expander("Diagnóstico de Desempenho", expanded=True):
+        st.caption(f"Acumulado deste processo do servidor. Também gravado em formato Prometheus em '{metricas.CAMINHO_ARQUIVO_METRICAS}'.")
+        etapas = metricas.REGISTRO.resumo_etapas()
+        if etapas:
+            st.dataframe(pd.DataFrame(etapas).set_index('Etapa').style.format(
+                {'Tempo total (s)': "{:.3f}", 'Tempo médio (ms)': "{:.1f}", 'Última (ms)': "{:.1f}",
+                 'Máxima (ms)': "{:.1f}", 'Bytes': "{:,}", 'Linhas': "{:,}"}))
+        else:
+            st.info("Nenhuma etapa medida ainda neste processo.")
+        linhas_contadores = [{'Contador': nome, **dict(rotulos), 'Valor': valor}
+                             for (nome, rotulos), valor in metricas.REGISTRO.resumo_contadores().items()]
+        if linhas_contadores:
+            st.dataframe(pd.DataFrame(linhas_contadores), hide_index=True)
+        for (nome, rotulos), valor in metricas.REGISTRO.resumo_medidas().items():
+            rotulo = f"{nome} ({', '.join(str(v) for _, v in rotulos)})" if rotulos else nome
+            if nome.endswith('_bytes'):
+                valor = f"{valor / 2 ** 20:,.1f} MB" if valor >= 2 ** 20 else f"{valor / 2 ** 10:,.1f} KB"
+            st.metric(rotulo, valor)
+
+
+# --- CORPO PRINCIPAL DO APP STREAMLIT ---
+# Só executado via `streamlit run dashboard.py`: importar o módulo (benchmarks, scripts) não monta a página
+def main():
+    st.set_page_config(layout="wide", page_title="Dashboard Macroeconômico Comparativo")
+    st.title("Análise Macroeconômica Comparativa Global 🌎")
     st.sidebar.header("Filtros de Análise")
-    paises_disponiveis_no_df = sorted(df_dados['País'].dropna().unique())
-    default_countries_candidates = ['Brasil', 'China', 'EUA'] 
-    default_countries = [p for p in default_countries_candidates if p in paises_disponiveis_no_df]
-    if not default_countries and paises_disponiveis_no_df:
-        default_countries = [paises_disponiveis_no_df[0]]
-
-    paises_selecionados_gerais = st.sidebar.multiselect( 
-        "Selecione os Países:", paises_disponiveis_no_df, default=default_countries, key="paises_gerais_v8"
+    modo_ampliado = st.sidebar.toggle(
+        "Todos os países e histórico completo", key="modo_ampliado_v8",
+        help=f"Inclui todas as entidades dos arquivos do Banco Mundial e os anos de {ANOS_RANGE_COMPLETO[0]} a {ANOS_RANGE_COMPLETO[1]}. Cada indicador é lido na primeira vez em que uma visualização precisa dele."
     )
-
-    anos_disponiveis_no_df = sorted(df_dados['Ano'].dropna().astype(int).unique(), reverse=True)
-    ano_selecionado_pontual = None 
-    if anos_disponiveis_no_df:
-        default_ano_index = 0
-        try: 
-            if 2022 in anos_disponiveis_no_df:
-                default_ano_index = anos_disponiveis_no_df.index(2022)
-        except ValueError:
-            pass 
-
-        ano_selecionado_pontual = st.sidebar.selectbox(
-            "Selecione o Ano (para comparações pontuais e correlação):", anos_disponiveis_no_df, index=default_ano_index, key="ano_pontual_corr_v8"
-        )
+    mostrar_diagnostico = st.sidebar.toggle(
+        "Diagnóstico de desempenho", key="diagnostico_v8",
+        help="Mostra, ao final da página, o tempo, as linhas e os bytes de cada etapa de dados e de cada figura, os acertos de cache e o uso de memória."
+    )
+    if modo_ampliado:
+        painel = obter_painel_completo()
     else:
-        st.sidebar.warning("Nenhum ano disponível.")
+        painel, mensagens_carregamento = carregar_todos_os_dados()
 
-    indicadores_disponiveis_df = [col for col in df_dados.columns if col not in ['País', 'Ano']]
+    # Preenchido ao final: no modo ampliado os indicadores são carregados ao longo da execução
+    expander_logs = st.expander("Logs de Carregamento de Dados", expanded=False)
 
-    if not paises_selecionados_gerais or ano_selecionado_pontual is None:
-        if not (df_dados.empty or len(df_dados.columns) <=2):
-            st.warning("Selecione países e um ano para visualizar as comparações pontuais.")
-    else:
-        df_filtrado_ano_pontual = df_dados[
-            (df_dados['País'].isin(paises_selecionados_gerais)) &
-            (df_dados['Ano'] == ano_selecionado_pontual)
-        ].copy()
-        
-        st.markdown("---")
-        st.header(f"Comparativo Pontual para o Ano de {ano_selecionado_pontual}")
-        
-        st.subheader("Tabela de Dados Comparativa")
-        if not df_filtrado_ano_pontual.empty:
-            df_tabela_display = df_filtrado_ano_pontual.dropna(subset=indicadores_disponiveis_df, how='all')
-            if not df_tabela_display.empty:
-                cols_para_tabela = ['País'] + [ind for ind in indicadores_disponiveis_df if ind in df_tabela_display.columns and df_tabela_display[ind].notna().any()]
-                st.dataframe(df_tabela_display[cols_para_tabela].set_index('País').style.format(na_rep="-", precision=2))
-            else:
-                st.info(f"Nenhum país com dados para os indicadores no ano {ano_selecionado_pontual}.")
-        else:
-            st.info(f"Nenhum dado para a combinação de filtros no ano {ano_selecionado_pontual}.")
-
-        # --- ALTERAÇÃO PRINCIPAL: DE COLUNAS PARA ABAS ---
-        # Troca st.columns por st.tabs para melhor visualização em mobile
-        tab_barras, tab_dispersao = st.tabs(["📊 Comparativo por Indicador", "📈 Análise de Correlação"])
-        
-        indicadores_com_dados_ano_pontual = [ind for ind in indicadores_disponiveis_df if ind in df_filtrado_ano_pontual.columns and df_filtrado_ano_pontual[ind].notna().any()]
-
-        with tab_barras:
-            st.subheader("Comparativo por Indicador (Gráfico de Barras)")
-            if indicadores_com_dados_ano_pontual:
-                indicador_barras = st.selectbox("Indicador:", indicadores_com_dados_ano_pontual, key="bar_ind_pontual_v8")
-                if indicador_barras:
-                    df_barras_valid = df_filtrado_ano_pontual.dropna(subset=[indicador_barras])
-                    if not df_barras_valid.empty:
-                        fig_barras = px.bar(df_barras_valid.sort_values(by=indicador_barras, ascending=False),
-                                            x='País', y=indicador_barras, color='País', 
-                                            title=f"{indicador_barras} em {ano_selecionado_pontual}")
-                        # AJUSTE RESPONSIVO
-                        fig_barras.update_layout(
-                            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                            font=dict(size=10)
-                        )
-                        st.plotly_chart(fig_barras, use_container_width=True)
-                    else: st.info(f"Sem dados para '{indicador_barras}' nos filtros atuais.")
-            else: st.info("Sem indicadores com dados para este ano/seleção (gráfico de barras).")
-
-        with tab_dispersao:
-            st.subheader("Análise de Correlação (Gráfico de Dispersão)")
-            indicadores_numericos_scatter = [ind for ind in indicadores_com_dados_ano_pontual if pd.api.types.is_numeric_dtype(df_filtrado_ano_pontual[ind])]
-            if len(indicadores_numericos_scatter) >= 2:
-                idx_x = 0
-                if 'PIB per capita (PPP Dólar)' in indicadores_numericos_scatter:
-                    idx_x = indicadores_numericos_scatter.index('PIB per capita (PPP Dólar)')
-                
-                indicador_x_scatter = st.selectbox("Indicador Eixo X:", indicadores_numericos_scatter, index=idx_x, key="scatter_x_pontual_v8")
-                indicador_y_scatter_opcoes = [ind for ind in indicadores_numericos_scatter if ind != indicador_x_scatter]
-                
-                if indicador_y_scatter_opcoes:
-                    indicador_y_scatter = st.selectbox("Indicador Eixo Y:", indicador_y_scatter_opcoes, index=0, key="scatter_y_pontual_v8")
-                    if indicador_x_scatter and indicador_y_scatter: 
-                        df_scatter_valid = df_filtrado_ano_pontual.dropna(subset=[indicador_x_scatter, indicador_y_scatter])
-                        if not df_scatter_valid.empty:
-                            fig_dispersao = px.scatter(df_scatter_valid, x=indicador_x_scatter, y=indicador_y_scatter, color='País',
-                                                    size=indicador_x_scatter, hover_name='País', 
-                                                    title=f"Correlação: {indicador_x_scatter} vs. {indicador_y_scatter} ({ano_selecionado_pontual})")
-                            # AJUSTE RESPONSIVO: Removido 'text' para evitar poluição e ajustado layout
-                            fig_dispersao.update_layout(
-                                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                                font=dict(size=10)
-                            )
-                            st.plotly_chart(fig_dispersao, use_container_width=True)
-                        else: st.info(f"Sem dados completos para '{indicador_x_scatter}' vs '{indicador_y_scatter}'.")
-                else: st.info("Precisa de pelo menos um outro indicador para o eixo Y.")
-            else: st.info("Sem indicadores numéricos suficientes para gráfico de dispersão.")
-
-    # --- Análise de Desenvolvimento ao Longo do Tempo ---
-    st.markdown("---")
-    st.header("Análise de Desenvolvimento ao Longo do Tempo")
-    
-    if not paises_selecionados_gerais:
-        st.warning("Selecione pelo menos um país na barra lateral para continuar.")
+    if not painel.indicadores:
+        st.error("Não foi possível carregar dados para os indicadores. Verifique os arquivos CSV na pasta 'dados_baixados' e os logs no console.")
     else:
-        df_filtrado_series_gerais = df_dados[df_dados['País'].isin(paises_selecionados_gerais)].copy()
+        st.markdown("""
+        Este dashboard permite a análise comparativa de indicadores macroeconômicos chave.
+        Os dados são lidos de arquivos CSV locais. Indicadores/países sem dados aparecerão como 'NaN' ou podem ser omitidos dos gráficos se não houver dados válidos.
+        """)
+
+        paises_disponiveis_no_df = sorted(painel.paises)
+        default_countries_candidates = ['Brasil', 'China', 'EUA'] 
+        default_countries = [p for p in default_countries_candidates if p in paises_disponiveis_no_df]
+        if not default_countries and paises_disponiveis_no_df:
+            default_countries = [paises_disponiveis_no_df[0]]
 
-        st.subheader("Evolução de Múltiplos Indicadores para um País")
-        pais_analise_multi_ind = st.selectbox(
-            "Selecione UM País:",
-            paises_selecionados_gerais, 
-            key="pais_multi_ind_v8" 
+        paises_selecionados_gerais = st.sidebar.multiselect( 
+            "Selecione os Países:", paises_disponiveis_no_df, default=default_countries, key="paises_gerais_v8"
         )
-        if pais_analise_multi_ind:
-            df_pais_selecionado_multi_ind = df_dados[df_dados['País'] == pais_analise_multi_ind].copy()
-            indicadores_pais_multi_ind = [ind for ind in indicadores_disponiveis_df if ind in df_pais_selecionado_multi_ind.columns and df_pais_selecionado_multi_ind[ind].notna().any()]
-            
-            if indicadores_pais_multi_ind:
-                indicadores_plot_multi_ind = st.multiselect(
-                    "Selecione indicadores para visualizar (um gráfico por indicador):",
-                    indicadores_pais_multi_ind,
-                    default=indicadores_pais_multi_ind[:min(2, len(indicadores_pais_multi_ind))], 
-                    key="select_multi_ind_v8" 
-                )
-                
-                if indicadores_plot_multi_ind:
-                    for indicador in indicadores_plot_multi_ind:
-                        df_indicador_especifico = df_pais_selecionado_multi_ind[['Ano', indicador]].dropna(subset=[indicador])
-                        if not df_indicador_especifico.empty:
-                            st.markdown(f"#### Evolução de **{indicador}** para **{pais_analise_multi_ind}**")
-                            fig_individual = px.line(df_indicador_especifico, x='Ano', y=indicador,
-                                                    title=f"Evolução de {indicador} para {pais_analise_multi_ind}", markers=True)
-                            # AJUSTE RESPONSIVO
-                            fig_individual.update_layout(font=dict(size=10), margin=dict(l=40, r=20, t=40, b=40))
-                            st.plotly_chart(fig_individual, use_container_width=True)
-                        else:
-                            st.info(f"Nenhum dado válido para o indicador '{indicador}' para {pais_analise_multi_ind}.")
-                else:
-                    st.info("Selecione pelo menos um indicador para visualizar sua evolução.")
-            else:
-                st.info(f"Nenhum indicador com dados disponível para {pais_analise_multi_ind}.")
 
-        st.markdown("---")
-        st.subheader("Série Temporal Comparativa (1 Indicador, Múltiplos Países)")
-        indicadores_com_dados_series_gerais = [ind for ind in indicadores_disponiveis_df if ind in df_filtrado_series_gerais.columns and df_filtrado_series_gerais[ind].notna().any()]
+        anos_disponiveis_no_df = sorted(painel.anos, reverse=True)
+        ano_selecionado_pontual = None 
+        if anos_disponiveis_no_df:
+            default_ano_index = 0
+            try: 
+                if 2022 in anos_disponiveis_no_df:
+                    default_ano_index = anos_disponiveis_no_df.index(2022)
+            except ValueError:
+                pass 
+
+            ano_selecionado_pontual = st.sidebar.selectbox(
+                "Selecione o Ano (para comparações pontuais e correlação):", anos_disponiveis_no_df, index=default_ano_index, key="ano_pontual_corr_v8"
+            )
+        else:
+            st.sidebar.warning("Nenhum ano disponível.")
 
-        if not indicadores_com_dados_series_gerais:
-            st.info("Nenhum indicador com dados disponíveis para os países selecionados.")
+        if not paises_selecionados_gerais or ano_selecionado_pontual is None:
+            if painel.indicadores:
+                st.warning("Selecione países e um ano para visualizar as comparações pontuais.")
         else:
-            indicador_serie_heatmap = st.selectbox(
-                "Selecione UM Indicador para Tabela de Série Temporal e Heatmap:",
-                indicadores_com_dados_series_gerais,
-                key="indicador_heatmap_v8"
-            )
-            if indicador_serie_heatmap:
-                df_serie_filtrada_indicador = df_filtrado_series_gerais[['País', 'Ano', indicador_serie_heatmap]].dropna(subset=[indicador_serie_heatmap])
-                if not df_serie_filtrada_indicador.empty:
-                    df_serie_pivot_table = df_serie_filtrada_indicador.pivot_table(
-                        index='País', columns='Ano', values=indicador_serie_heatmap
-                    ).dropna(how='all', axis=0).dropna(how='all', axis=1)
-
-                    st.markdown(f"**Tabela de Série Temporal para: {indicador_serie_heatmap}**")
-                    if not df_serie_pivot_table.empty:
-                        st.dataframe(df_serie_pivot_table.style.format(na_rep="-", precision=2).background_gradient(cmap='viridis', axis=None))
-                    else:
-                        st.info(f"Nenhum dado para '{indicador_serie_heatmap}' após pivotar.")
-
-                    st.markdown(f"**Mapa de Calor (Heatmap) para: {indicador_serie_heatmap}**")
-                    if not df_serie_pivot_table.empty and df_serie_pivot_table.shape[0] > 0 and df_serie_pivot_table.shape[1] > 0:
-                        fig_heatmap = px.imshow(df_serie_pivot_table, labels=dict(x="Ano", y="País", color=indicador_serie_heatmap),
-                                                text_auto=".2f", aspect="auto", color_continuous_scale=px.colors.sequential.Viridis)
-                        fig_heatmap.update_xaxes(side="bottom")
-                        fig_heatmap.update_layout(title_text=f"Heatmap: {indicador_serie_heatmap} ao longo dos Anos", font=dict(size=10))
-                        st.plotly_chart(fig_heatmap, use_container_width=True)
-                    else:
-                        st.info(f"Não há dados suficientes para gerar o heatmap.")
-                else:
-                    st.info(f"Nenhum dado para '{indicador_serie_heatmap}' para os países selecionados no período.")
-            else: 
-                st.info("Selecione um indicador para a tabela e o heatmap.")
-
-    # --- SEÇÃO MATRIZ DE CORRELAÇÃO ---
-    if paises_selecionados_gerais and ano_selecionado_pontual:
+            st.markdown("---")
+            st.header(f"Comparativo Pontual para o Ano de {ano_selecionado_pontual}")
+
+            secao_tabela_comparativa(painel, paises_selecionados_gerais, ano_selecionado_pontual, modo_ampliado)
+
+            # --- ALTERAÇÃO PRINCIPAL: DE COLUNAS PARA ABAS ---
+            # Troca st.columns por st.tabs para melhor visualização em mobile
+            tab_barras, tab_dispersao = st.tabs(["📊 Comparativo por Indicador", "📈 Análise de Correlação"])
+
+            indicadores_com_dados_ano_pontual = painel.indicadores_com_dados(paises_selecionados_gerais, ano_selecionado_pontual)
+
+            with tab_barras:
+                secao_grafico_barras(painel, paises_selecionados_gerais, ano_selecionado_pontual, indicadores_com_dados_ano_pontual)
+
+            with tab_dispersao:
+                secao_grafico_dispersao(painel, paises_selecionados_gerais, ano_selecionado_pontual, indicadores_com_dados_ano_pontual)
+
+        # --- Análise de Desenvolvimento ao Longo do Tempo ---
         st.markdown("---")
-        st.header(f"Matriz de Correlação entre Indicadores ({ano_selecionado_pontual})")
-        st.markdown(f"""
-        Esta seção mostra a correlação de Pearson entre os indicadores para os **países e o ano selecionados na barra lateral**.
-        Valores próximos de 1 indicam forte correlação positiva, próximos de -1 forte correlação negativa, e próximos de 0 pouca correlação linear.
-        """)
+        st.header("Análise de Desenvolvimento ao Longo do Tempo")
 
-        if df_filtrado_ano_pontual.empty:
-            st.info(f"Nenhum dado disponível para os países selecionados no ano {ano_selecionado_pontual} para calcular correlações.")
+        if not paises_selecionados_gerais:
+            st.warning("Selecione pelo menos um país na barra lateral para continuar.")
         else:
-            df_para_corr = df_filtrado_ano_pontual[indicadores_disponiveis_df].copy().dropna(axis=1, how='all')
-            cols_numericas_corr = [col for col in df_para_corr.columns if pd.api.types.is_numeric_dtype(df_para_corr[col])]
-            df_para_corr_numeric = df_para_corr[cols_numericas_corr]
-
-            if df_para_corr_numeric.shape[1] >= 2 and df_para_corr_numeric.dropna(how='all').shape[0] >= 2:
-                matriz_corr = df_para_corr_numeric.corr()
-                if not matriz_corr.empty:
-                    fig_corr_heatmap = px.imshow(matriz_corr, text_auto=".2f", aspect="auto",
-                                                color_continuous_scale=px.colors.diverging.RdBu, zmin=-1, zmax=1)
-                    fig_corr_heatmap.update_layout(
-                        title_text=f"Matriz de Correlação ({ano_selecionado_pontual}, Países: {', '.join(paises_selecionados_gerais)})",
-                        font=dict(size=10) # Ajuste de fonte
-                    )
-                    st.plotly_chart(fig_corr_heatmap, use_container_width=True)
-                else:
-                    st.info("Não foi possível calcular a matriz de correlação (matriz resultante vazia).")
-            else:
-                st.info(f"Não há dados ou indicadores numéricos suficientes para os filtros selecionados para calcular uma matriz de correlação (necessário ≥2 indicadores e ≥2 países com dados).")
+            secao_evolucao_pais(painel, paises_selecionados_gerais)
+            st.markdown("---")
+            secao_serie_temporal(painel, paises_selecionados_gerais, modo_ampliado)
 
-    st.markdown("---")
-    st.markdown("Dashboard desenvolvido para fins de demonstração na máteria de economia.")
-    st.markdown("Fonte dos dados: Arquivos CSV locais retirados do Banco Mundial.")
\ No newline at end of file
+        # --- SEÇÃO MATRIZ DE CORRELAÇÃO ---
+        if paises_selecionados_gerais and ano_selecionado_pontual:
+            secao_matriz_correlacao(painel, paises_selecionados_gerais, ano_selecionado_pontual, modo_ampliado)
+
+        st.markdown("---")
+        st.markdown("Dashboard desenvolvido para fins de demonstração na máteria de economia.")
+        st.markdown("Fonte dos dados: Arquivos CSV locais retirados do Banco Mundial.")
+
+    if modo_ampliado:
+        mensagens_carregamento = list(painel.mensagens.values())
+    with expander_logs:
+        for msg in mensagens_carregamento:
+            if "✔️" in msg: st.success(msg)
+            elif "⚠️" in msg: st.warning(msg)
+            elif "❌" in msg: st.error(msg)
+            else: st.info(msg)
+
+    if mostrar_diagnostico:
+        secao_diagnostico()
+    metricas.REGISTRO.gravar_se_necessario()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# Instrumentação do dashboard: tempo, linhas e bytes por etapa, contadores de cache e uso de memória.
+# Só biblioteca padrão. As métricas ficam em memória no processo (REGISTRO), aparecem no painel de diagnóstico
+# do dashboard e são gravadas em formato texto do Prometheus, lido pelo textfile collector do node exporter.
+import os
+import time
+import threading
+import tempfile
+import contextlib
+
+try:
+    import resource
+except ImportError:  # Windows: sem pico de memória do processo
+    resource = None
+
+# Arquivo .prom para o textfile collector (mesma pasta do cache em disco de dados.py); vazio desativa a gravação
+CAMINHO_ARQUIVO_METRICAS = os.environ.get("DASHBOARD_ARQUIVO_METRICAS", os.path.join(".cache_dados", "metricas.prom"))
+# Intervalo mínimo, em segundos, entre gravações automáticas do arquivo ao fim de uma etapa
+INTERVALO_GRAVACAO_METRICAS = 10.0
+PREFIXO_METRICAS = "dashboard"
+
+def pico_memoria_processo():
+    # Pico de memória residente do processo, em bytes (ru_maxrss é KiB no Linux e bytes no macOS)
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if os.uname().sysname == 'Darwin' else pico * 1024
+
+def _rotulos_prometheus(rotulos):
+    if not rotulos:
+        return ""
+    escapados = (str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, valor in rotulos)
+    return "{" + ",".join(f'{nome}="{valor}"' for (nome, _), valor in zip(rotulos, escapados)) + "}"
+
+class RegistroMetricas:
+    # Etapas e contadores são identificados por (nome, rótulos ordenados), como as séries do Prometheus
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.etapas = {}
+        self.contadores = {}
+        self.medidas = {}
+        self.ultima_gravacao = 0.0
+        # As sessões do Streamlit são threads do mesmo processo: uma gravação por vez
+        self.trava_gravacao = threading.Lock()
+
+    @contextlib.contextmanager
+    def medir(self, etapa, **rotulos):
+        # Uso: `with medir('read_csv') as info: ...; info['linhas'] = len(df)`. Linhas e bytes são opcionais.
+        info = {}
+        inicio = time.perf_counter()
+        try:
+            yield info
+        finally:
+            duracao = time.perf_counter() - inicio
+            chave = (etapa, tuple(sorted(rotulos.items())))
+            with self.trava:
+                estatisticas = self.etapas.setdefault(chave, {'execucoes': 0, 'segundos': 0.0, 'ultima': 0.0,
+                                                              'maxima': 0.0, 'linhas': 0, 'bytes': 0})
+                estatisticas['execucoes'] += 1
+                estatisticas['segundos'] += duracao
+                estatisticas['ultima'] = duracao
+                estatisticas['maxima'] = max(estatisticas['maxima'], duracao)
+                estatisticas['linhas'] += int(info.get('linhas', 0))
+                estatisticas['bytes'] += int(info.get('bytes', 0))
+            self.gravar_se_necessario()
+
+    def contar(self, nome, incremento=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self.trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + incremento
+
+    def definir(self, nome, valor, **rotulos):
+        with self.trava:
+            self.medidas[(nome, tuple(sorted(rotulos.items())))] = valor
+
+    def resumo_etapas(self):
+        # Linhas prontas para uma tabela: uma por (etapa, rótulos)
+        with self.trava:
+            itens = sorted(self.etapas.items())
+        return [{'Etapa': etapa + (f" ({', '.join(str(valor) for _, valor in rotulos)})" if rotulos else ""),
+                 'Execuções': est['execucoes'], 'Tempo total (s)': est['segundos'],
+                 'Tempo médio (ms)': est['segundos'] / est['execucoes'] * 1000, 'Última (ms)': est['ultima'] * 1000,
+                 'Máxima (ms)': est['maxima'] * 1000, 'Linhas': est['linhas'], 'Bytes': est['bytes']}
+                for (etapa, rotulos), est in itens]
+
+    def resumo_contadores(self):
+        with self.trava:
+            return {(nome, rotulos): valor for (nome, rotulos), valor in sorted(self.contadores.items())}
+
+    def resumo_medidas(self):
+        with self.trava:
+            medidas = dict(self.medidas)
+        pico = pico_memoria_processo()
+        if pico is not None:
+            medidas[('processo_pico_memoria_bytes', ())] = pico
+        return dict(sorted(medidas.items()))
+
+    def texto_prometheus(self):
+        with self.trava:
+            etapas = sorted(self.etapas.items())
+        series = [
+            ('etapa_execucoes_total', 'counter', "Execuções de cada etapa.", 'execucoes'),
+            ('etapa_segundos_total', 'counter', "Tempo de parede acumulado em cada etapa.", 'segundos'),
+            ('etapa_ultima_segundos', 'gauge', "Duração da execução mais recente de cada etapa.", 'ultima'),
+            ('etapa_maxima_segundos', 'gauge', "Maior duração observada de cada etapa.", 'maxima'),
+            ('etapa_linhas_total', 'counter', "Linhas processadas por cada etapa.", 'linhas'),
+            ('etapa_bytes_total', 'counter', "Bytes processados por cada etapa.", 'bytes'),
+        ]
+        linhas = []
+        for nome, tipo, ajuda, campo in series:
+            linhas += [f"# HELP {PREFIXO_METRICAS}_{nome} {ajuda}", f"# TYPE {PREFIXO_METRICAS}_{nome} {tipo}"]
+            for (etapa, rotulos), est in etapas:
+                linhas.append(f"{PREFIXO_METRICAS}_{nome}{_rotulos_prometheus((('etapa', etapa),) + rotulos)} {est[campo]}")
+        for titulo, tipo, valores in (('contadores', 'counter', self.resumo_contadores()),
+                                      ('medidas', 'gauge', self.resumo_medidas())):
+            declarados = set()
+            for (nome, rotulos), valor in valores.items():
+                if nome not in declarados:
+                    linhas.append(f"# TYPE {PREFIXO_METRICAS}_{nome} {tipo}")
+                    declarados.add(nome)
+                linhas.append(f"{PREFIXO_METRICAS}_{nome}{_rotulos_prometheus(rotulos)} {valor}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, caminho_arquivo=None):
+        # Gravação atômica (temporário exclusivo na mesma pasta + rename): o node exporter nunca lê um arquivo
+        # pela metade, nem com várias threads ou processos gravando
+        caminho_arquivo = caminho_arquivo or CAMINHO_ARQUIVO_METRICAS
+        if not caminho_arquivo:
+            return
+        with self.trava_gravacao:
+            self.ultima_gravacao = time.monotonic()
+            caminho_tmp = None
+            try:
+                pasta = os.path.dirname(caminho_arquivo)
+                if pasta:
+                    os.makedirs(pasta, exist_ok=True)
+                descritor, caminho_tmp = tempfile.mkstemp(prefix=os.path.basename(caminho_arquivo) + ".", suffix=".tmp",
+                                                          dir=pasta or None)
+                with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+                    f.write(self.texto_prometheus())
+                # mkstemp cria o arquivo com 0600; o node exporter costuma rodar com outro usuário
+                os.chmod(caminho_tmp, 0o644)
+                os.replace(caminho_tmp, caminho_arquivo)
+            except Exception as e:
+                print(f"AVISO: Não foi possível gravar as métricas em '{caminho_arquivo}': {e}")
+                if caminho_tmp is not None and os.path.exists(caminho_tmp):
+                    os.remove(caminho_tmp)
+
+    def gravar_se_necessario(self):
+        if time.monotonic() - self.ultima_gravacao >= INTERVALO_GRAVACAO_METRICAS:
+            self.gravar()
+
+# Registro único do processo, compartilhado por todas as sessões do Streamlit
+REGISTRO = RegistroMetricas()
+medir = REGISTRO.medir
+contar = REGISTRO.contar
+definir = REGISTRO.definir
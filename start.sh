@@ -1,2 +1,5 @@
 #!/bin/bash
-streamlit run dashboard.py --server.port 10000 --server.address=0.0.0.0
\ No newline at end of file
+# Valida os arquivos de dados e pré-aquece o cache em disco antes de subir o servidor:
+# um arquivo inválido falha o deploy em vez da página do primeiro visitante
+python dados.py || exit 1
+streamlit run dashboard.py --server.port 10000 --server.address=0.0.0.0
@@ -0,0 +1,5 @@
+# Os testes importam os módulos da raiz do projeto (dados.py, metricas.py) sem instalação
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
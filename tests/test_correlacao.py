@@ -0,0 +1,69 @@
+# MotorCorrelacao contra DataFrame.corr nas consultas em que o cancelamento numérico é mais provável:
+# subconjuntos pequenos de países e janelas de um ou dois anos, num painel longo com escalas muito diferentes
+import numpy as np
+import pandas as pd
+import pytest
+
+import dados
+
+N_PAISES, N_ANOS, N_INDICADORES = 40, 65, 5
+
+@pytest.fixture(scope="module")
+def painel():
+    rng = np.random.default_rng(7)
+    tendencia = np.linspace(0.0, 3.0, N_ANOS)[None, :, None]
+    valores = (rng.normal(size=(N_PAISES, N_ANOS, N_INDICADORES)) + tendencia) * np.array([1e4, 1.0, 1e-2, 50.0, 3.0]) \
+        + np.array([1e5, 10.0, 0.0, -20.0, 1e3])
+    # Dois indicadores quase colineares e faltas espalhadas
+    valores[:, :, 1] = valores[:, :, 0] * 1e-4 + rng.normal(size=(N_PAISES, N_ANOS)) * 0.05
+    valores[rng.random(valores.shape) < 0.3] = np.nan
+    paises = [f"País {i}" for i in range(N_PAISES)]
+    anos = list(range(1960, 1960 + N_ANOS))
+    indicadores = [f"Indicador {k}" for k in range(N_INDICADORES)]
+    return dados.PainelIndicadores(paises, anos, indicadores, valores)
+
+@pytest.fixture(scope="module")
+def motor(painel):
+    return dados.MotorCorrelacao(painel)
+
+def correlacao_pandas(painel, paises, ano_inicio, ano_fim):
+    i_paises = [painel.idx_pais[pais] for pais in paises]
+    bloco = painel.valores[i_paises][:, painel.idx_ano[ano_inicio]:painel.idx_ano[ano_fim] + 1]
+    df = pd.DataFrame(bloco.reshape(-1, len(painel.indicadores)), columns=painel.indicadores)
+    return df.dropna(axis=1, how='all').corr()
+
+def consultas(painel, n_consultas, tamanhos, duracoes, semente):
+    rng = np.random.default_rng(semente)
+    for _ in range(n_consultas):
+        paises = list(rng.choice(painel.paises, size=int(rng.choice(tamanhos)), replace=False))
+        duracao = int(rng.choice(duracoes))
+        ano_inicio = int(rng.integers(painel.anos[0], painel.anos[-1] - duracao + 2))
+        yield paises, ano_inicio, ano_inicio + duracao - 1
+
+@pytest.mark.parametrize("tamanhos, duracoes", [
+    ((2, 3, 4), (1,)),      # poucos países, um único ano
+    ((2, 3, 4), (2,)),
+    ((10, 25, 40), (1, 5, 65)),
+])
+def test_correlacao_igual_ao_pandas(painel, motor, tamanhos, duracoes):
+    for paises, ano_inicio, ano_fim in consultas(painel, 400, tamanhos, duracoes, semente=len(tamanhos) + sum(duracoes)):
+        matriz, _ = motor.correlacao(paises, ano_inicio, ano_fim)
+        esperado = correlacao_pandas(painel, paises, ano_inicio, ano_fim)
+        assert list(matriz.columns) == list(esperado.columns)
+        np.testing.assert_allclose(matriz.to_numpy(), esperado.to_numpy(), rtol=0, atol=1e-6, equal_nan=True,
+                                   err_msg=f"{paises} {ano_inicio}-{ano_fim}")
+
+def test_painel_sem_faltas(painel):
+    # Sem faltas o motor não guarda `n`; o resultado tem de ser o mesmo. As faltas são preenchidas na escala
+    # de cada indicador, como num painel real
+    ruido = np.random.default_rng(3).normal(size=painel.valores.shape)
+    preenchimento = np.nanmean(painel.valores, axis=(0, 1)) + ruido * np.nanstd(painel.valores, axis=(0, 1))
+    valores = np.where(np.isnan(painel.valores), preenchimento, painel.valores)
+    completo = dados.PainelIndicadores(painel.paises, painel.anos, painel.indicadores, valores)
+    motor = dados.MotorCorrelacao(completo)
+    assert motor.sem_faltas
+    for paises, ano_inicio, ano_fim in consultas(completo, 100, (2, 3, 10), (1, 3), semente=1):
+        matriz, n_linhas = motor.correlacao(paises, ano_inicio, ano_fim)
+        np.testing.assert_allclose(matriz.to_numpy(), correlacao_pandas(completo, paises, ano_inicio, ano_fim).to_numpy(),
+                                   rtol=0, atol=1e-6, equal_nan=True)
+        assert n_linhas == len(paises) * (ano_fim - ano_inicio + 1)